@@ -0,0 +1,120 @@
+import math
+import numpy as np
+
+
+# Radius and speed of an asteroid for each size (3 is the biggest)
+RADIUS = {1: 15, 2: 30, 3: 60}
+SPEED = {1: 1.25, 2: 1, 3: 0.75}
+
+# Directions of the two pieces an asteroid breaks into, relative to its own
+SPLIT_ANGLES = (math.radians(-17.18), math.radians(28.65))  # about -0.3 and 0.5 radians
+
+
+class AsteroidField:
+    """All the asteroids of one player, stored in a slot pool.
+
+    Each asteroid is a slot in a set of fixed-capacity arrays. Destroyed
+    asteroids go back on a free list, and splitting writes the two pieces into
+    the parent's slot and one free slot, so the work done per tick only depends
+    on how many asteroids are flying and memory stays flat over long games.
+    """
+
+    def __init__(self, world, capacity=32):
+        self.world = world
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.size = np.zeros(capacity, dtype=np.int64)
+        self.radius = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))  # Lowest slot is handed out first
+        self.count = 0  # Number of asteroids flying
+
+    def __len__(self):
+        return self.count
+
+    def live(self):
+        """Returns the slots of the asteroids still flying, in slot order."""
+        return np.flatnonzero(self.alive)
+
+    def spawn(self, x, y, vel_x, vel_y, size):
+        """Adds an asteroid heading along (vel_x, vel_y) and returns its slot."""
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self._write(slot, x, y, vel_x, vel_y, size)
+        self.alive[slot] = True
+        self.count += 1
+        return slot
+
+    def _write(self, slot, x, y, vel_x, vel_y, size):
+        speed = math.hypot(vel_x, vel_y)
+        self.pos[slot] = (x, y)
+        self.vel[slot] = (vel_x / speed * SPEED[size], vel_y / speed * SPEED[size])
+        self.size[slot] = size
+        self.radius[slot] = RADIUS[size]
+
+    def _grow(self):
+        """Doubles the capacity; only needed if a game outgrows the initial pool."""
+        capacity = len(self.alive)
+        self.pos = np.concatenate([self.pos, np.zeros((capacity, 2))])
+        self.vel = np.concatenate([self.vel, np.zeros((capacity, 2))])
+        self.size = np.concatenate([self.size, np.zeros(capacity, dtype=np.int64)])
+        self.radius = np.concatenate([self.radius, np.zeros(capacity)])
+        self.alive = np.concatenate([self.alive, np.zeros(capacity, dtype=bool)])
+        self.free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def share(self, pos, vel, size, radius, alive):
+        """Moves the asteroids into the given arrays (rows of a PhysicsEngine), which become this field's storage.
+
+        They may be longer than the field: slots keep their numbers, and the
+        extra ones are handed out in the same order _grow would add them.
+        """
+        capacity = len(self.alive)
+        for target, source in ((pos, self.pos), (vel, self.vel), (size, self.size), (radius, self.radius), (alive, self.alive)):
+            target[:capacity] = source
+            target[capacity:] = 0
+        self.free[:0] = range(len(alive) - 1, capacity - 1, -1)  # Only used once the existing free slots run out
+        self.pos, self.vel, self.size, self.radius, self.alive = pos, vel, size, radius, alive
+
+    def is_hit(self, slot):
+        """Destroys the asteroid in slot, breaking it in two unless it is the smallest size."""
+        size = int(self.size[slot])
+        if size == 1:  # No splitting for the smallest asteroids
+            self.alive[slot] = False
+            self.free.append(slot)
+            self.count -= 1
+            return
+
+        x, y = self.pos[slot]
+        vel_x, vel_y = self.vel[slot]
+        pieces = []
+        for angle in SPLIT_ANGLES:
+            cos, sin = math.cos(angle), math.sin(angle)
+            pieces.append((vel_x * cos - vel_y * sin, vel_x * sin + vel_y * cos))
+
+        # First piece takes over the parent's slot, the second gets a free one
+        self._write(slot, x, y, pieces[0][0], pieces[0][1], size - 1)
+        self.spawn(x, y, pieces[1][0], pieces[1][1], size - 1)
+
+    def move(self):
+        live = self.alive
+        self.pos[live] += self.vel[live]
+        self.wrap_around_screen()
+
+    def wrap_around_screen(self):
+        """Moves asteroids more than 50 pixels off an edge to the opposite edge."""
+        for axis, size in ((0, self.world.width), (1, self.world.height)):
+            coord = self.pos[:, axis]
+            coord[coord < -50] = size + 50
+            coord[coord > size + 50] = -50
+
+    def overlap_positions(self, slots):
+        """Returns where the asteroids in slots also show up on the far side of the screen, and which are near an edge."""
+        width, height = self.world.width, self.world.height
+        pos = self.pos[slots]
+        radius = self.radius[slots]
+        low = pos < -50 + radius[:, None]
+        high = pos > np.array([width + 50, height + 50]) - radius[:, None]
+        span = np.array([width + 100, height + 100])
+        overlap = pos + low * span - high * span
+        return overlap, np.any(low | high, axis=1)
@@ -0,0 +1,92 @@
+import numpy as np
+from Genome import sigmoid
+
+
+class BatchBrain:
+    """The networks of a whole population packed into one set of padded arrays.
+
+    Genome p becomes row p of a (P, N, N) weight tensor (N being the largest
+    node count, weight[p, to, from]) plus a (P, N) table of node layers. One
+    forward() call then evaluates every network: layer by layer, a batched
+    matrix-vector product followed by a sigmoid on the nodes of that layer.
+    Node indices are positions in each genome's node list, so inputs come
+    first, then outputs, just like Genome.feed_forward.
+
+    Dropped genomes are only masked out: their rows keep being evaluated
+    (and ignored) until half the rows are dead, and only then are the
+    arrays compacted, so a death doesn't copy the whole weight tensor.
+    """
+
+    def __init__(self, genomes):
+        self.inputs = genomes[0].inputs
+        self.outputs = genomes[0].outputs
+        count = len(genomes)
+        size = max(len(genome.nodes) for genome in genomes)
+
+        self.weights = np.zeros((count, size, size))
+        self.node_layers = np.full((count, size), -1)  # Padding nodes sit in no layer
+        self.bias = np.zeros(count, dtype=np.intp)
+        self.layers = max(genome.layers for genome in genomes)
+        self.slots = np.arange(count)  # Which genome (index into genomes) each row of the arrays holds
+        self.alive = np.ones(count, dtype=bool)  # Rows not dropped yet
+        self.rows = self.slots  # Genomes still in the batch, in row order
+
+        for p, genome in enumerate(genomes):
+            index = {node.number: i for i, node in enumerate(genome.nodes)}
+            self.node_layers[p, :len(genome.nodes)] = [node.layer for node in genome.nodes]
+            self.bias[p] = index[genome.biasNode]
+            for from_number, to_number, weight, enabled in zip(genome.from_number, genome.to_number, genome.weight, genome.enabled):
+                if enabled:
+                    self.weights[p, index[to_number], index[from_number]] += weight
+
+    def __len__(self):
+        return len(self.rows)
+
+    def forward(self, vision):
+        """Returns the (P, outputs) decisions for a (P, inputs) matrix of vision vectors, one row per remaining genome."""
+        count, size = self.node_layers.shape
+        values = np.zeros((count, size))
+        values[self.alive, :self.inputs] = vision  # Dropped rows just see zeros
+        values[np.arange(count), self.bias] = 1  # Bias node output is always 1
+
+        for layer in range(1, self.layers):
+            in_layer = self.node_layers == layer
+            if not in_layer.any():
+                continue
+            input_sum = np.einsum('pij,pj->pi', self.weights, values)
+            values = np.where(in_layer, sigmoid(input_sum), values)
+
+        return values[self.alive, self.inputs:self.inputs + self.outputs]
+
+    def drop(self, genome_indices):
+        """Removes these genomes (e.g. players that died) from the batch.
+
+        Their rows are masked out; once half the rows are dead the rest are
+        sliced out of the existing arrays. Nothing is rebuilt from the genomes.
+        """
+        if not len(genome_indices):
+            return
+        self.alive &= ~np.isin(self.slots, genome_indices)
+        self.rows = self.slots[self.alive]
+        if len(self.rows) <= len(self.slots) // 2:
+            self.compact()
+
+    def compact(self):
+        """Slices the dropped rows out of the arrays."""
+        alive = self.alive
+        self.weights = self.weights[alive]
+        self.node_layers = self.node_layers[alive]
+        self.bias = self.bias[alive]
+        self.slots = self.rows
+        self.alive = np.ones(len(self.slots), dtype=bool)
+
+    @staticmethod
+    def decide(decisions):
+        """Applies the Player.think thresholds to a (P, 4) decision matrix.
+
+        Returns arrays of boosting flags, spins and shoot flags.
+        """
+        boosting = decisions[:, 0] > 0.8
+        spin = np.where(decisions[:, 1] > 0.8, -0.08, np.where(decisions[:, 2] > 0.8, 0.08, 0.0))
+        shoot = decisions[:, 3] > 0.8
+        return boosting, spin, shoot
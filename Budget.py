@@ -0,0 +1,63 @@
+import time
+
+
+# Why a game was ended early, as recorded in Player.truncated (None for a
+# game that ended with the ship being destroyed). The position of a reason
+# in this tuple is its code in Distributed's binary results.
+REASONS = ('max_ticks', 'idle', 'generation_seconds')
+
+
+class Budget:
+    """Limits on how long an episode may run before it is ended early.
+
+    max_ticks        - no game lasts more than this many ticks
+    idle_ticks       - a game ends once the ship has gone this many ticks
+                       without firing or moving more than idle_distance
+                       pixels (sitting still or spinning in a quiet spot)
+    generation_seconds - wall-clock time the whole generation may take;
+                       games still running then are ended
+
+    All are off (None) by default. A truncated game keeps the score and
+    lifespan it had reached and the player records the reason in
+    player.truncated. Everything but generation_seconds only depends on the
+    game itself, so it ends at the same tick in every evaluation mode; a
+    wall-clock cutoff depends on how fast the machine is.
+    """
+
+    def __init__(self, max_ticks=None, idle_ticks=None, idle_distance=2.0, generation_seconds=None):
+        self.max_ticks = max_ticks
+        self.idle_ticks = idle_ticks
+        self.idle_distance = idle_distance
+        self.generation_seconds = generation_seconds
+
+    @property
+    def limited(self):
+        return self.max_ticks is not None or self.idle_ticks is not None or self.generation_seconds is not None
+
+    def deadline(self):
+        """Returns the time.time() at which a generation starting now runs out of time, or None."""
+        return time.time() + self.generation_seconds if self.generation_seconds is not None else None
+
+    def check(self, player, deadline=None):
+        """Ends the player's game if it has used up its budget; call once per tick. Returns the reason, or None."""
+        if player.dead:
+            return None
+        reason = None
+        if self.max_ticks is not None and player.lifespan >= self.max_ticks:
+            reason = 'max_ticks'
+        elif self.idle_ticks is not None and self._idle(player):
+            reason = 'idle'
+        elif deadline is not None and time.time() >= deadline:
+            reason = 'generation_seconds'
+        if reason is not None:
+            player.truncate(reason)
+        return reason
+
+    def _idle(self, player):
+        """Returns whether the player has neither fired nor moved idle_distance in the last idle_ticks ticks."""
+        anchor = player.idle_anchor  # (tick, x, y, shots fired) when the player last did something
+        if (anchor is None or player.shots_fired != anchor[3]
+                or (player.pos.x - anchor[1]) ** 2 + (player.pos.y - anchor[2]) ** 2 > self.idle_distance ** 2):
+            player.idle_anchor = (player.lifespan, player.pos.x, player.pos.y, player.shots_fired)
+            return False
+        return player.lifespan - anchor[0] >= self.idle_ticks
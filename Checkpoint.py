@@ -0,0 +1,261 @@
+import json
+import os
+import queue
+import threading
+from array import array
+import numpy as np
+from Budget import Budget, REASONS
+from Genome import Genome
+from InnovationRegistry import InnovationRegistry
+from Node import Node
+from Player import Player
+from Species import Species
+from World import World
+from connectionHistory import ConnectionHistory
+
+
+# A checkpoint is a single .npz file. Genomes are not pickled as object
+# graphs: every genome's genes and nodes are concatenated into a handful of
+# flat arrays with a row of offsets per genome, and players, species and the
+# innovation records are small tables pointing into those. Plain scalars and
+# the RNG states go in a JSON string stored alongside.
+
+GENOME_FIELDS = ('inputs', 'outputs', 'layers', 'next_node', 'bias_node', 'gene_start', 'node_start')
+PLAYER_FIELDS = ('genome', 'seed_used', 'seeds_start', 'replay')
+PLAYER_SCORES = ('fitness', 'score', 'best_score', 'best_lifespan', 'best_truncated')
+TRUNCATION_CODES = (None,) + REASONS  # best_truncated is stored as its position in here
+
+
+class _Tables:
+    """Collects genomes and players into flat arrays while a checkpoint is being built."""
+
+    def __init__(self):
+        self.genomes = []
+        self.innovation, self.from_number, self.to_number = array('q'), array('q'), array('q')
+        self.weight, self.enabled = array('d'), array('b')
+        self.node_number, self.node_layer = array('q'), array('q')
+        self.players, self.player_scores = [], []
+        self.seeds = array('q')
+
+    def add_genome(self, genome):
+        self.genomes.append((genome.inputs, genome.outputs, genome.layers, genome.nextNode, genome.biasNode,
+                             len(self.innovation), len(self.node_number)))
+        self.innovation.extend(genome.innovation)
+        self.from_number.extend(genome.from_number)
+        self.to_number.extend(genome.to_number)
+        self.weight.extend(genome.weight)
+        self.enabled.extend(genome.enabled)
+        for node in genome.nodes:
+            self.node_number.append(node.number)
+            self.node_layer.append(node.layer)
+        return len(self.genomes) - 1
+
+    def add_player(self, player):
+        if player is None:
+            return -1
+        self.players.append((self.add_genome(player.brain), player.seed_used, len(self.seeds), player.replay))
+        self.player_scores.append((player.fitness, player.score, player.best_score, player.best_lifespan,
+                                   TRUNCATION_CODES.index(player.best_truncated)))
+        self.seeds.extend(player.seeds_used)
+        return len(self.players) - 1
+
+    def arrays(self):
+        genomes = np.array(self.genomes + [(0, 0, 0, 0, 0, len(self.innovation), len(self.node_number))], dtype=np.int64)
+        players = np.array(self.players + [(-1, 0, len(self.seeds), 0)], dtype=np.int64)
+        return {
+            'genomes': genomes,  # One row per genome (GENOME_FIELDS), plus a final row of end offsets
+            'innovation': np.array(self.innovation, dtype=np.int64),
+            'from_number': np.array(self.from_number, dtype=np.int64),
+            'to_number': np.array(self.to_number, dtype=np.int64),
+            'weight': np.array(self.weight, dtype=float),
+            'enabled': np.array(self.enabled, dtype=np.int8),
+            'node_number': np.array(self.node_number, dtype=np.int64),
+            'node_layer': np.array(self.node_layer, dtype=np.int64),
+            'players': players,  # One row per player (PLAYER_FIELDS), plus a final row of end offsets
+            'player_scores': np.array(self.player_scores, dtype=float).reshape(-1, len(PLAYER_SCORES)),
+            'seeds': np.array(self.seeds, dtype=np.int64),
+        }
+
+
+def snapshot(population):
+    """Returns the state of a population as a dict of arrays, ready to be written by save."""
+    tables = _Tables()
+    pop = [tables.add_player(player) for player in population.pop]
+    gen_players = [tables.add_player(player) for player in population.gen_players]
+    best_player = tables.add_player(population.best_player)
+    species = [(tables.add_genome(s.rep) if s.rep is not None else -1, tables.add_player(s.champ), s.staleness)
+               for s in population.species]
+    species_fitness = [(s.best_fitness, s.average_fitness) for s in population.species]
+
+    history = population.innovation_history
+    records = list(history)
+    record_numbers = array('q')
+    record_rows = []
+    for record in records:
+        record_rows.append((record.from_node, record.to_node, record.innovation_number, len(record_numbers)))
+        record_numbers.extend(record.innovation_numbers)
+    record_rows.append((0, 0, 0, len(record_numbers)))
+
+    seed_seq = population.rng.bit_generator.seed_seq
+    meta = {
+        'gen': population.gen,
+        'best_score': population.best_score,
+        'prune_innovation_history': population.prune_innovation_history,
+        'next_innovation': history.next_innovation,
+        'pop': pop,
+        'gen_players': gen_players,
+        'best_player': best_player,
+        'rng_state': population.rng.bit_generator.state,
+        'rng_seed_seq': {'entropy': seed_seq.entropy, 'spawn_key': list(seed_seq.spawn_key),
+                         'pool_size': seed_seq.pool_size, 'n_children_spawned': seed_seq.n_children_spawned},
+        'random_state': population.random.getstate(),
+        'budget': vars(population.budget),
+        'keep_clone_seeds': population.keep_clone_seeds,
+        'world': [population.world.width, population.world.height],
+    }
+
+    arrays = tables.arrays()
+    arrays['species'] = np.array(species, dtype=np.int64).reshape(-1, 3)  # rep genome, champ player, staleness
+    arrays['species_fitness'] = np.array(species_fitness, dtype=float).reshape(-1, 2)  # best, average fitness
+    arrays['records'] = np.array(record_rows, dtype=np.int64)  # from, to, innovation number, start of its genome's numbers
+    arrays['record_numbers'] = np.array(record_numbers, dtype=np.int64)
+    arrays['meta'] = np.array(json.dumps(meta))
+    return arrays
+
+
+def save(arrays, path):
+    """Writes a snapshot to path atomically: a crash mid-write leaves the previous checkpoint intact."""
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        np.savez_compressed(file, **arrays)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def restore(population, path, world=None):
+    """Loads the checkpoint at path into population, replacing its players, species and history.
+
+    The games are played on world if given, else on a field the size of the
+    one the checkpoint was written on.
+    """
+    with np.load(path) as data:
+        data = {name: data[name] for name in data.files}
+    meta = json.loads(str(data['meta']))
+    population.world = world if world is not None else World(*meta['world'])
+
+    genomes = [_load_genome(data, i) for i in range(len(data['genomes']) - 1)]
+    players = [_load_player(data, i, genomes, population.world) for i in range(len(data['players']) - 1)]
+
+    population.pop = [players[i] for i in meta['pop']]
+    population.gen_players = [players[i] for i in meta['gen_players']]
+    population.best_player = players[meta['best_player']] if meta['best_player'] >= 0 else None
+    population.species = []
+    for (rep, champ, staleness), (best_fitness, average_fitness) in zip(data['species'], data['species_fitness']):
+        s = Species()
+        s.rep = genomes[rep] if rep >= 0 else None
+        s.champ = players[champ] if champ >= 0 else None
+        s.staleness = int(staleness)
+        s.best_fitness = float(best_fitness)
+        s.average_fitness = float(average_fitness)
+        population.species.append(s)
+
+    history = InnovationRegistry(meta['next_innovation'])
+    records, numbers = data['records'], data['record_numbers']
+    for i in range(len(records) - 1):
+        from_node, to_node, innovation_number, start = records[i].tolist()
+        history.add(ConnectionHistory(from_node, to_node, innovation_number, numbers[start:records[i + 1, 3]].tolist()))
+    population.innovation_history = history
+
+    population.gen = meta['gen']
+    population.best_score = meta['best_score']
+    population.prune_innovation_history = meta['prune_innovation_history']
+    population.budget = Budget(**meta['budget'])
+    population.keep_clone_seeds = meta['keep_clone_seeds']
+    population.batch_brain = None
+    population.physics = None
+    seed_seq = np.random.SeedSequence(**meta['rng_seed_seq'])
+    population.rng = np.random.Generator(np.random.PCG64(seed_seq))
+    population.rng.bit_generator.state = meta['rng_state']
+    version, state, gauss_next = meta['random_state']
+    population.random.setstate((version, tuple(state), gauss_next))
+    return population
+
+
+def _load_genome(data, index):
+    inputs, outputs, layers, next_node, bias_node, gene_start, node_start = data['genomes'][index].tolist()
+    gene_end, node_end = data['genomes'][index + 1, 5:].tolist()
+    genome = Genome(inputs, outputs, True)
+    genome.layers = layers
+    genome.nextNode = next_node
+    genome.biasNode = bias_node
+    genome.innovation = array('q', data['innovation'][gene_start:gene_end].tobytes())
+    genome.from_number = array('q', data['from_number'][gene_start:gene_end].tobytes())
+    genome.to_number = array('q', data['to_number'][gene_start:gene_end].tobytes())
+    genome.weight = array('d', data['weight'][gene_start:gene_end].tobytes())
+    genome.enabled = array('b', data['enabled'][gene_start:gene_end].tobytes())
+    for number, layer in zip(data['node_number'][node_start:node_end].tolist(), data['node_layer'][node_start:node_end].tolist()):
+        node = Node(number)
+        node.layer = layer
+        genome.add_node_gene(node)
+    return genome
+
+
+def _load_player(data, index, genomes, world):
+    genome, seed_used, seeds_start, replay = data['players'][index].tolist()
+    player = Player.from_genome(genomes[genome], seed_used, world, replay=bool(replay))
+    fitness, score, best_score, best_lifespan, best_truncated = data['player_scores'][index].tolist()
+    player.fitness = fitness
+    player.score = int(score)
+    player.best_score = int(best_score)
+    player.best_lifespan = int(best_lifespan)
+    player.best_truncated = TRUNCATION_CODES[int(best_truncated)]
+    player.seeds_used = data['seeds'][seeds_start:data['players'][index + 1, 2]].tolist()
+    return player
+
+
+class CheckpointWriter:
+    """Saves a population every few generations from a background thread.
+
+    maybe_save takes the snapshot on the calling thread (so it is consistent)
+    and queues it; compressing and writing it to disk happens on the writer
+    thread, so evolution carries on without waiting for the disk.
+    """
+
+    def __init__(self, path, every=10):
+        self.path = path
+        self.every = every
+        self.queue = queue.Queue()
+        self.error = None  # Exception raised by the last failed write, re-raised on the caller's thread
+        self.thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self.thread.start()
+
+    def maybe_save(self, population):
+        """Queues a checkpoint if population.gen is a multiple of every."""
+        if population.gen % self.every == 0:
+            self.save(population)
+
+    def save(self, population):
+        self._raise_error()
+        self.queue.put(snapshot(population))
+
+    def close(self):
+        """Waits for queued checkpoints to be written and stops the thread."""
+        self.queue.put(None)
+        self.thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        while True:
+            arrays = self.queue.get()
+            if arrays is None:
+                return
+            try:
+                save(arrays, self.path)
+            except Exception as error:  # Kept for the main thread; the next checkpoint may still succeed
+                self.error = error
@@ -0,0 +1,67 @@
+import math
+
+
+CELL_SIZE = 150  # Big enough that the largest asteroid (plus the ship) spans at most 2x2 cells
+PLAYER_RADIUS = 15  # How close the ship may get to an asteroid's edge before it is hit
+
+
+class SpatialHash:
+    """Uniform grid over one player's asteroids, used as the broad phase for collisions.
+
+    The grid is rebuilt every tick from the AsteroidField. Asteroids near an
+    edge are also inserted at their wrapped-around position on the far side,
+    so a query only has to look at the single cell a point falls in, and the
+    narrow phase compares squared distances.
+    """
+
+    def __init__(self, field, cell_size=CELL_SIZE):
+        self.field = field
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) -> list of (slot, x, y, radius, is_ghost)
+
+    def rebuild(self):
+        self.cells.clear()
+        field = self.field
+        slots = field.live()
+        if len(slots) == 0:
+            return
+        overlap, near = field.overlap_positions(slots)
+        pos = field.pos[slots].tolist()
+        radius = field.radius[slots].tolist()
+        overlap = overlap.tolist()
+        near = near.tolist()
+        for i, slot in enumerate(slots.tolist()):
+            self._insert(slot, pos[i][0], pos[i][1], radius[i], False)
+            if near[i]:
+                self._insert(slot, overlap[i][0], overlap[i][1], radius[i], True)
+
+    def _insert(self, slot, x, y, radius, is_ghost):
+        size = self.cell_size
+        reach = radius + PLAYER_RADIUS
+        entry = (slot, x, y, radius, is_ghost)
+        for column in range(math.floor((x - reach) / size), math.floor((x + reach) / size) + 1):
+            for row in range(math.floor((y - reach) / size), math.floor((y + reach) / size) + 1):
+                self.cells.setdefault((column, row), []).append(entry)
+
+    def _candidates(self, x, y):
+        return self.cells.get((math.floor(x / self.cell_size), math.floor(y / self.cell_size)), ())
+
+    def bullet_hit(self, bullet_pos):
+        """Returns the first slot (in slot order) of an asteroid the bullet is inside of, or -1."""
+        hit = -1
+        for slot, x, y, radius, _ in self._candidates(bullet_pos.x, bullet_pos.y):
+            dx, dy = x - bullet_pos.x, y - bullet_pos.y
+            if dx * dx + dy * dy < radius * radius and (hit < 0 or slot < hit):
+                hit = slot
+        return hit
+
+    def player_hits(self, player_pos):
+        """Returns the slots of every asteroid touching the ship, in slot order."""
+        hits = set()
+        for slot, x, y, radius, is_ghost in self._candidates(player_pos.x, player_pos.y):
+            dx, dy = x - player_pos.x, y - player_pos.y
+            # The ship's own size is only allowed for on the asteroid itself, not its wrapped copy
+            reach = radius if is_ghost else radius + PLAYER_RADIUS
+            if dx * dx + dy * dy < reach * reach:
+                hits.add(slot)
+        return sorted(hits)
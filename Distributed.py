@@ -0,0 +1,298 @@
+import argparse
+import contextlib
+import io
+import itertools
+import queue
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from Budget import Budget, REASONS
+from Episode import run_episode
+from Genome import Genome
+from World import World
+
+
+# Every message is a 4-byte big-endian length followed by that many bytes.
+# A task is TASK + the genome's to_bytes(), a result is RESULT + the seeds
+# drawn during the game as little-endian int64s, and an empty message tells
+# the worker to shut down.
+LENGTH = struct.Struct('>I')
+# Task id, seed, world width, world height, then the budget: max ticks, idle ticks (-1 for none), idle distance
+# and the generation's time.time() deadline (-1 for none)
+TASK = struct.Struct('<qqqqqqdd')
+# Task id, score, lifespan, shots fired, shots hit, truncation reason (0 for none, else 1 + its index in REASONS)
+RESULT = struct.Struct('<qqqqqq')
+TRUNCATION_CODES = (None,) + REASONS
+
+
+class Coordinator:
+    """Hands episodes out to worker processes that connect over TCP.
+
+    Workers are started separately, on this machine or any other, with
+
+        python Distributed.py worker HOST PORT
+
+    and can join or leave at any time. Each connected worker gets its own
+    thread here, which takes tasks off a shared queue one at a time. A task
+    whose worker disconnects (or takes longer than task_timeout seconds) is
+    put back on the queue for another worker. Results are matched to tasks
+    by id, so map returns the same list however many workers there are and
+    whichever of them played each game. If no worker is connected for
+    worker_wait seconds while a map is waiting, it gives up with a
+    ConnectionError rather than waiting forever.
+
+    python Distributed.py check plays a few generations on workers started
+    on localhost, killing one of them mid-run, and compares the outcome with
+    playing them in one process.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, task_timeout=None, worker_wait=60.0):
+        self.task_timeout = task_timeout
+        self.worker_wait = worker_wait
+        self.tasks = queue.Queue()  # (task id, message) waiting for a worker; None stops one worker thread
+        self.pending = set()  # Ids of the tasks of the map in progress
+        self.results = {}  # Task id -> result dict, for the map in progress
+        self.lock = threading.Condition()  # Guards pending, results and live
+        self.task_ids = itertools.count()
+        self.workers = []  # Threads serving connected workers
+        self.live = 0  # Workers connected right now
+        self.closed = False
+
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()  # The port actually bound when port=0
+        self.accept_thread = threading.Thread(target=self._accept, name='coordinator-accept', daemon=True)
+        self.accept_thread.start()
+
+    def map(self, genomes, seeds, world, budget=None, deadline=None):
+        """Plays one episode per (genome, seed) on the workers and returns the results in order.
+
+        The deadline is compared with the workers' own clocks, so machines
+        running workers should keep their clocks in sync.
+        """
+        budget = budget if budget is not None else Budget()
+        limits = (world.width, world.height, _ticks(budget.max_ticks), _ticks(budget.idle_ticks),
+                  budget.idle_distance, deadline if deadline is not None else -1.0)
+        ids = [next(self.task_ids) for _ in genomes]
+        with self.lock:
+            self.pending.update(ids)
+        for task_id, genome, seed in zip(ids, genomes, seeds):
+            self.tasks.put((task_id, b'T' + TASK.pack(task_id, seed, *limits) + genome.to_bytes()))
+
+        with self.lock:
+            alone_since = None  # When the last worker left (or map started with none)
+            while len(self.results) < len(ids):
+                if self.live:
+                    alone_since = None
+                    self.lock.wait()
+                    continue
+                now = time.monotonic()
+                alone_since = alone_since if alone_since is not None else now
+                if now - alone_since >= self.worker_wait:
+                    self._cancel()
+                    raise ConnectionError(f"no evaluation workers connected for {self.worker_wait} seconds")
+                self.lock.wait(self.worker_wait - (now - alone_since))
+            self.pending.clear()
+            return [self.results.pop(task_id) for task_id in ids]
+
+    def _cancel(self):
+        """Forgets the map in progress: its queued tasks are dropped and late results ignored."""
+        self.pending.clear()
+        self.results.clear()
+        while True:
+            try:
+                self.tasks.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        """Tells every connected worker to exit and stops listening."""
+        self.closed = True
+        self.server.close()
+        for _ in self.workers:
+            self.tasks.put(None)
+        for thread in self.workers:
+            thread.join()
+
+    def _accept(self):
+        while not self.closed:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:  # The server socket was closed
+                return
+            connection.settimeout(self.task_timeout)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            thread = threading.Thread(target=self._serve, args=(connection,), name='coordinator-worker', daemon=True)
+            self.workers.append(thread)
+            thread.start()
+
+    def _serve(self, connection):
+        with self.lock:
+            self.live += 1
+        try:
+            with connection:
+                self._serve_tasks(connection)
+        finally:
+            with self.lock:
+                self.live -= 1
+                self.lock.notify_all()
+
+    def _serve_tasks(self, connection):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                try:
+                    send_message(connection, b'')
+                except OSError:
+                    pass
+                return
+            task_id, message = task
+            try:
+                send_message(connection, message)
+                result_id, result = decode_result(receive_message(connection))
+            except OSError:  # Worker lost or too slow: someone else plays this one
+                with self.lock:
+                    if task_id in self.pending:
+                        self.tasks.put(task)
+                return
+            with self.lock:
+                if result_id in self.pending:  # Not from a map that gave up
+                    self.results[result_id] = result
+                    self.lock.notify_all()
+
+
+def _ticks(value):
+    return value if value is not None else -1
+
+
+def decode_task(message):
+    """Returns (task id, genome, seed, world, budget, deadline) from a task message."""
+    task_id, seed, width, height, max_ticks, idle_ticks, idle_distance, deadline = TASK.unpack_from(message, 1)
+    budget = Budget(max_ticks if max_ticks >= 0 else None, idle_ticks if idle_ticks >= 0 else None, idle_distance)
+    return (task_id, Genome.from_bytes(message[1 + TASK.size:]), seed, World(width, height), budget,
+            deadline if deadline >= 0 else None)
+
+
+def encode_result(task_id, result):
+    seeds = array('q', result['seeds_used'])
+    if sys.byteorder != 'little':
+        seeds.byteswap()
+    return (b'R' + RESULT.pack(task_id, result['score'], result['lifespan'], result['shots_fired'], result['shots_hit'],
+                               TRUNCATION_CODES.index(result['truncated']))
+            + seeds.tobytes())
+
+
+def decode_result(message):
+    """Returns (task id, result dict in the form run_episode returns) from a result message."""
+    task_id, score, lifespan, shots_fired, shots_hit, truncated = RESULT.unpack_from(message, 1)
+    seeds = array('q')
+    seeds.frombytes(message[1 + RESULT.size:])
+    if sys.byteorder != 'little':
+        seeds.byteswap()
+    return task_id, {
+        'score': score,
+        'lifespan': lifespan,
+        'shots_fired': shots_fired,
+        'shots_hit': shots_hit,
+        'seeds_used': seeds.tolist(),
+        'truncated': TRUNCATION_CODES[truncated],
+    }
+
+
+def send_message(connection, message):
+    connection.sendall(LENGTH.pack(len(message)) + message)
+
+
+def receive_message(connection):
+    (length,) = LENGTH.unpack(receive_exactly(connection, LENGTH.size))
+    return receive_exactly(connection, length)
+
+
+def receive_exactly(connection, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed mid-message")
+        data += chunk
+    return bytes(data)
+
+
+def run_worker(host, port):
+    """Connects to a Coordinator and plays the episodes it sends until told to stop."""
+    with socket.create_connection((host, port)) as connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                message = receive_message(connection)
+            except ConnectionError:  # Coordinator went away
+                return
+            if not message:
+                return
+            task_id, genome, seed, world, budget, deadline = decode_task(message)
+            send_message(connection, encode_result(task_id, run_episode(genome, seed, world, budget, deadline)))
+
+
+def check(workers=3, size=30, generations=3, seed=1):
+    """Plays generations on worker processes started on localhost and in this process; returns whether they agree.
+
+    One of the workers is killed during the first generation, so its tasks
+    have to be picked up by the others.
+    """
+    from Population import Population
+
+    def run(population):
+        outcome = []
+        for _ in range(generations):
+            population.evaluate(workers=1)
+            outcome.append((population.best_score, [player.brain.to_bytes() for player in population.pop]))
+        population.close()
+        return outcome
+
+    expected = run(Population(size, seed=seed))
+
+    population = Population(size, seed=seed)
+    host, port = population.serve_workers(worker_wait=10)
+    processes = [subprocess.Popen([sys.executable, __file__, 'worker', host, str(port)]) for _ in range(workers)]
+    def kill_one():  # As soon as results come in, so the workers are busy with the rest of the generation
+        while not population.coordinator.results and processes[0].poll() is None:
+            time.sleep(0.01)
+        processes[0].kill()
+
+    killer = threading.Thread(target=kill_one, daemon=True)
+    killer.start()
+    try:
+        outcome = run(population)
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+    return outcome == expected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluation worker for Population.serve_workers.")
+    subparsers = parser.add_subparsers(dest='role', required=True)
+    worker = subparsers.add_parser('worker', help="connect to a coordinator and play the games it sends")
+    worker.add_argument('host')
+    worker.add_argument('port', type=int)
+    checker = subparsers.add_parser('check', help="check localhost workers against playing in one process")
+    checker.add_argument('--workers', type=int, default=3)
+    checker.add_argument('--population', type=int, default=30)
+    checker.add_argument('--generations', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.role == 'worker':
+        run_worker(args.host, args.port)
+        return 0
+    with contextlib.redirect_stdout(io.StringIO()):  # Natural selection's progress lines
+        same = check(args.workers, args.population, args.generations)
+    print("Workers agree with a local run" if same else "Workers DIFFER from a local run")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
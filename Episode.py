@@ -0,0 +1,31 @@
+from Player import Player
+
+
+def run_episode(genome, seed, world, budget=None, deadline=None):
+    """Play one full game with the given brain and seed and return the fitness components.
+
+    This is the unit of work handed to evaluation workers, so it only takes and
+    returns plain picklable data. With a Budget the game may be ended early
+    (deadline is the generation's time.time() cutoff, see Budget.deadline);
+    the result then says why in "truncated".
+    """
+    player = Player.from_genome(genome, seed, world)
+    player.brain.generate_network()
+    if budget is not None and not budget.limited and deadline is None:  # A worker's budget carries no generation_seconds
+        budget = None
+
+    while not player.dead:
+        player.look()
+        player.think()
+        player.update()
+        if budget is not None:
+            budget.check(player, deadline)
+
+    return {
+        "score": player.score,
+        "lifespan": player.lifespan,
+        "shots_fired": player.shots_fired,
+        "shots_hit": player.shots_hit,
+        "seeds_used": player.seeds_used,
+        "truncated": player.truncated,
+    }
@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import collections
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Budget import Budget
+from Episode import run_episode
+from Replay import genome_from_data
+from World import World
+
+
+RATE_WINDOW = 10.0  # Seconds of completed episodes the per_second counter averages over
+LINE_LIMIT = 64 * 1024 * 1024  # Longest request line accepted, in bytes (a batch of genomes is one line)
+
+
+class EvaluationService:
+    """Scores genomes for other programs over a line-delimited JSON socket protocol.
+
+    Each line sent to the service is one JSON object. To score genomes:
+
+        {"op": "evaluate", "id": "batch-1", "genomes": [GENOME, ...], "seeds": [7, 8, ...],
+         "world": [800, 600]}
+
+    where each GENOME is in the form Replay.genome_data writes, and seeds and
+    world are optional (a missing seed is drawn at random and reported back).
+    An optional "budget": {"max_ticks": 5000, "idle_ticks": 300, ...} takes
+    Budget's arguments; generation_seconds then counts from submission.
+    The service answers with one line per genome as soon as its game ends,
+    in whatever order they finish:
+
+        {"id": "batch-1", "index": 1, "seed": 8, "result": {"score": 3, "lifespan": 812, ...}}
+
+    and then {"id": "batch-1", "done": true} once the whole batch is in.
+    {"op": "stats"} returns the counters described in stats().
+
+    At most max_queue episodes wait for the worker pool at once. Once the
+    queue is full the service stops reading from clients until there is
+    room again, so a burst of work slows the senders down instead of
+    filling memory. Each client's lines are written by its own task, so a
+    client that reads slowly only holds up itself. A client may close its
+    sending side after its last request and still gets every result; one
+    that disconnects has its queued episodes skipped.
+    """
+
+    def __init__(self, workers=None, max_queue=256, world=None, seed=None):
+        self.workers = workers
+        self.world = world if world is not None else World()
+        self.random = random.Random(seed)  # Seeds for genomes submitted without one
+        self.queue = None  # asyncio.Queue of episodes waiting for the pool, made on the service's loop in start()
+        self.max_queue = max_queue
+        self.executor = None
+        self.runners = []
+        self.clients = set()  # Tasks serving connected clients
+        self.server = None
+
+        self.started = None
+        self.submitted = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0  # Episodes dropped because their client disconnected
+        self.finished_at = collections.deque()  # Completion times within the last RATE_WINDOW seconds
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """Starts listening on a TCP port (or on a Unix socket at path) and returns the bound address."""
+        self.started = time.monotonic()
+        self.queue = asyncio.Queue(self.max_queue)
+        concurrency = self.workers or os.cpu_count() or 1
+        # Spawned, not forked: pool processes start on demand, and a forked one would inherit (and hold open)
+        # the sockets of clients connected at the time, so closing them would never reach the client
+        self.executor = ProcessPoolExecutor(max_workers=concurrency, mp_context=multiprocessing.get_context('spawn'))
+        self.runners = [asyncio.create_task(self._run_episodes()) for _ in range(concurrency)]
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle_client, path, limit=LINE_LIMIT)
+        else:
+            self.server = await asyncio.start_server(self._handle_client, host, port, limit=LINE_LIMIT)
+        return self.server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        tasks = self.runners + list(self.clients)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.executor.shutdown(cancel_futures=True)
+
+    def stats(self):
+        """Returns the queue depth and throughput counters."""
+        now = time.monotonic()
+        self._forget_before(now - RATE_WINDOW)
+        uptime = now - self.started if self.started is not None else 0.0
+        return {
+            'queued': self.queue.qsize() if self.queue is not None else 0,
+            'max_queue': self.max_queue,
+            'running': self.running,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'per_second': round(len(self.finished_at) / min(RATE_WINDOW, uptime), 2) if uptime > 0 else 0.0,
+            'uptime_s': round(uptime, 3),
+        }
+
+    def _forget_before(self, cutoff):
+        while self.finished_at and self.finished_at[0] < cutoff:
+            self.finished_at.popleft()
+
+    async def _run_episodes(self):
+        """Feeds queued episodes to the pool, one at a time; one of these runs per worker."""
+        loop = asyncio.get_running_loop()
+        while True:
+            genome, seed, world, budget, deadline, client, report = await self.queue.get()
+            try:
+                if client.lost:  # Nobody left to send the result to
+                    self.skipped += 1
+                    report(seed)
+                    continue
+                self.running += 1
+                try:
+                    result = await loop.run_in_executor(self.executor, run_episode, genome, seed, world, budget, deadline)
+                except Exception as error:
+                    self.failed += 1
+                    report(seed, error=error)
+                else:
+                    self.completed += 1
+                    self.finished_at.append(time.monotonic())
+                    report(seed, result)
+                finally:
+                    self.running -= 1
+            finally:
+                self.queue.task_done()
+
+    async def _handle_client(self, reader, writer):
+        self.clients.add(asyncio.current_task())
+        client = _Client(writer)
+        try:
+            await self._read_requests(reader, client)
+            # The client may have only closed its sending side: keep writing until every batch is done
+            await client.finished.wait()
+            await client.flush()
+        except (ConnectionError, asyncio.CancelledError):  # Client gone, or close() is shutting the service down
+            client.disconnect()
+        finally:
+            self.clients.discard(asyncio.current_task())
+            client.writer_task.cancel()
+            writer.close()
+
+    async def _read_requests(self, reader, client):
+        while not client.lost:
+            try:
+                line = await reader.readline()
+            except ValueError:  # Longer than LINE_LIMIT; the rest of the stream can't be trusted
+                client.send({'error': "request line too long"})
+                return
+            if not line:
+                return
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if request.get('op') == 'stats':
+                    client.send(self.stats())
+                elif request.get('op') == 'evaluate':
+                    await self._submit(request, client)
+                else:
+                    raise ValueError(f"unknown op {request.get('op')!r}")
+            except (ValueError, KeyError, TypeError) as error:
+                client.send({'error': str(error)})
+
+    async def _submit(self, request, client):
+        """Queues every genome of an evaluate request, waiting for room in the queue as needed."""
+        request_id = request.get('id')
+        genomes = [genome_from_data(genes) for genes in request['genomes']]
+        seeds = request.get('seeds') or [None] * len(genomes)
+        if len(seeds) != len(genomes):
+            raise ValueError("seeds and genomes differ in length")
+        world = World(*request['world']) if 'world' in request else self.world
+        budget = Budget(**request.get('budget', {}))
+        deadline = budget.deadline()
+        remaining = [len(genomes)]
+
+        if not genomes:
+            client.send({'id': request_id, 'done': True})
+            return
+        client.open_batch()
+
+        def reporter(index):
+            def report(seed, result=None, error=None):
+                """Queues the episode's line (nothing for a skipped one) and the done line after the last."""
+                if result is not None or error is not None:
+                    message = {'id': request_id, 'index': index, 'seed': seed}
+                    if error is None:
+                        message['result'] = result
+                    else:
+                        message['error'] = repr(error)
+                    client.send(message)
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    client.send({'id': request_id, 'done': True})
+                    client.close_batch()
+            return report
+
+        for index, (genome, seed) in enumerate(zip(genomes, seeds)):
+            seed = seed if seed is not None else self.random.randint(1, 1000000000)
+            self.submitted += 1
+            await self.queue.put((genome, seed, world, budget, deadline, client, reporter(index)))
+
+
+class _Client:
+    """A connection's outgoing lines and its unfinished batches.
+
+    Lines are queued here and written by the connection's own writer task,
+    so the episode runners never wait on a client that reads slowly.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.outbox = asyncio.Queue()  # Messages waiting to be written; None ends the writer task
+        self.open_batches = 0  # Evaluate requests whose done line hasn't been queued yet
+        self.finished = asyncio.Event()  # Set while open_batches is zero (or the client is gone)
+        self.finished.set()
+        self.gone = False
+        self.writer_task = asyncio.create_task(self._write())
+
+    @property
+    def lost(self):
+        """Whether the connection has failed, so its queued work can be skipped."""
+        return self.gone or self.writer.is_closing()
+
+    def send(self, message):
+        if not self.gone:
+            self.outbox.put_nowait(message)
+
+    def open_batch(self):
+        self.open_batches += 1
+        self.finished.clear()
+
+    def close_batch(self):
+        self.open_batches -= 1
+        if self.open_batches == 0:
+            self.finished.set()
+
+    def disconnect(self):
+        self.gone = True
+        self.finished.set()  # Nothing more will be delivered
+
+    async def flush(self):
+        """Waits for every queued line to be written."""
+        self.outbox.put_nowait(None)
+        await self.writer_task
+
+    async def _write(self):
+        while True:
+            message = await self.outbox.get()
+            if message is None:
+                return
+            try:
+                self.writer.write(json.dumps(message).encode() + b'\n')
+                await self.writer.drain()
+            except ConnectionError:
+                self.disconnect()
+                return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve genome evaluations over line-delimited JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--max-queue', type=int, default=256)
+    args = parser.parse_args(argv)
+
+    async def serve():
+        service = EvaluationService(args.workers, args.max_queue)
+        address = await service.start(args.host, args.port, args.unix)
+        print(f"Evaluating genomes on {address}")
+        sys.stdout.flush()
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import hashlib
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """Remembers episode results by genome fingerprint and seed, so a game already played isn't played again.
+
+    An episode is deterministic for a given network, seed, world size and
+    budget (see Budget), so a genome that comes back unchanged (a champion
+    carried over, a clone that mutate left alone) on the same seed gets its
+    result from here. Games ended by the wall-clock budget are not cached,
+    as where they stop depends on the machine. The least recently used
+    entries are dropped once there are more than size.
+
+    Players get a fresh seed every generation, so entries are only found
+    again when seeds are reused: set population.keep_clone_seeds to let
+    clones play their parent's seed.
+    """
+
+    def __init__(self, size=4096):
+        self.size = size
+        self.entries = OrderedDict()  # Key -> episode result, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Returns the cached result for key, or None."""
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if result.get('truncated') == 'generation_seconds':
+            return
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.entries),
+            'size': self.size,
+        }
+
+
+def fingerprint(genome, seed, world, budget=None):
+    """Returns a stable hash of everything an episode's result depends on.
+
+    That is the network (node numbers and layers, connections, weights and
+    enabled flags), the seed, the world size and the tick limits of the
+    budget. Innovation numbers are left out: they don't change what the
+    network does.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((seed, world.width, world.height, genome.inputs, genome.outputs,
+                        [(node.number, node.layer) for node in genome.nodes])).encode())
+    if budget is not None:
+        digest.update(repr((budget.max_ticks, budget.idle_ticks, budget.idle_distance)).encode())
+    for values in (genome.from_number, genome.to_number, genome.weight, genome.enabled):
+        digest.update(values.tobytes())
+    return digest.digest()
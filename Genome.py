@@ -1,180 +1,207 @@
 import random
-import math
-import pygame
-from pygame.math import Vector2
+import struct
+import sys
+from array import array
+import numpy as np
 from Node import Node  
 from connectionGene import ConnectionGene
 
 
+# Header of Genome.to_bytes: inputs, outputs, layers, next node, bias node, node count, gene count
+_HEADER = struct.Struct('<7q')
+
+
 class Genome:
-    def __init__(self, inputs, outputs, is_crossover=False):
-        self.genes = []  # List of connectionGene
+    """A network's nodes and connection genes.
+
+    The genes are not stored as objects but as parallel typed arrays (one
+    entry per gene, in the order the genes were added): innovation number,
+    from and to node number, weight and enabled flag. The genes property
+    still hands out ConnectionGene views for code that wants gene objects.
+    """
+
+    def __init__(self, inputs, outputs, is_crossover=False, random_source=random):
+        self.innovation = array('q')  # Innovation number of each gene
+        self.from_number = array('q')  # Number of the node each connection starts at
+        self.to_number = array('q')  # Number of the node each connection ends at
+        self.weight = array('d')
+        self.enabled = array('b')
         self.nodes = []  # List of Node
+        self.node_index = {}  # Node number -> Node
         self.inputs = inputs
         self.outputs = outputs
         self.layers = 2
         self.nextNode = 0
         self.biasNode = None
-        self.network = []  # List of Node, the network to process feedforward
+        self.topology = None  # NetworkTopology of the genes, shared with clones until one of them changes shape
+        self.plan = None  # NetworkPlan compiled from the genes, see generate_network
+        self.sorted_genes = None  # Cached result of gene_arrays
 
         if not is_crossover:
-            self._initialize_nodes_and_genes()
+            self._initialize_nodes_and_genes(random_source)
 
-    def _initialize_nodes_and_genes(self):
+    def _initialize_nodes_and_genes(self, random_source):
         localNextConnectionNumber = 0
 
         # Create input nodes
         for i in range(self.inputs):
             node = Node(i)
             node.layer = 0
-            self.nodes.append(node)
+            self.add_node_gene(node)
             self.nextNode += 1
 
         # Create output nodes
         for i in range(self.outputs):
             node = Node(i + self.inputs)
             node.layer = 1
-            self.nodes.append(node)
+            self.add_node_gene(node)
             self.nextNode += 1
 
         # Add bias node
         bias_node = Node(self.nextNode)
         bias_node.layer = 0
-        self.nodes.append(bias_node)
+        self.add_node_gene(bias_node)
         self.biasNode = self.nextNode
         self.nextNode += 1
 
         # Connect inputs to outputs
         for i in range(self.inputs):
             for j in range(self.outputs):
-                self.genes.append(
-                    ConnectionGene(self.nodes[i], self.nodes[self.inputs + j], random.uniform(-1, 1), localNextConnectionNumber)
-                )
+                self.add_gene(i, self.inputs + j, random_source.uniform(-1, 1), localNextConnectionNumber)
                 localNextConnectionNumber += 1
 
         # Connect bias to outputs
         for i in range(self.outputs):
-            self.genes.append(
-                ConnectionGene(self.nodes[self.biasNode], self.nodes[self.inputs + i], random.uniform(-1, 1), localNextConnectionNumber)
-            )
+            self.add_gene(self.biasNode, self.inputs + i, random_source.uniform(-1, 1), localNextConnectionNumber)
             localNextConnectionNumber += 1
 
-    def get_node(self, node_number):
-        for node in self.nodes:
-            if node.number == node_number:
-                return node
-        return None
+    @property
+    def genes(self):
+        """The genes as a list of ConnectionGene views into the arrays."""
+        return [ConnectionGene(self, i) for i in range(len(self.innovation))]
 
-    def connect_nodes(self):
-        for node in self.nodes:
-            node.output_connections.clear()
+    def add_gene(self, from_number, to_number, weight, innovation_no, enabled=True):
+        """Appends a connection gene between two node numbers."""
+        self.innovation.append(innovation_no)
+        self.from_number.append(from_number)
+        self.to_number.append(to_number)
+        self.weight.append(weight)
+        self.enabled.append(enabled)
 
-        for gene in self.genes:
-            gene.from_node.output_connections.append(gene)
+    def get_node(self, node_number):
+        return self.node_index.get(node_number)
+
+    def add_node_gene(self, node):
+        """Appends a node, keeping the node number index up to date."""
+        self.nodes.append(node)
+        self.node_index[node.number] = node
+
+    def is_connected(self, node1, node2):
+        """Returns whether there is a gene between these two nodes, in either direction."""
+        if node1.layer == node2.layer:  # Nodes in the same layer cannot be connected
+            return False
+        if node1.layer > node2.layer:
+            node1, node2 = node2, node1
+        from_number, to_number = node1.number, node2.number
+        return any(f == from_number and t == to_number for f, t in zip(self.from_number, self.to_number))
 
     def feed_forward(self, input_values):
-        # Set input values to input nodes
-        for i in range(self.inputs):
-            self.nodes[i].output_value = input_values[i]
-
-        # Bias node output is always 1
-        self.nodes[self.biasNode].output_value = 1
-
-        # Engage each node in the network (feedforward)
-        for node in self.network:
-            node.engage()
-
-        # Collect outputs
-        output_values = [self.nodes[self.inputs + i].output_value for i in range(self.outputs)]
-
-        # Reset nodes for next feedforward
-        for node in self.nodes:
-            node.inputSum = 0
-
-        return output_values
+        """Returns the output values of the network for these inputs."""
+        if self.plan is None:
+            self.generate_network()
+        return self.plan.evaluate(input_values)
 
     def generate_network(self):
-        self.connect_nodes()
-        self.network = []
-        # Add nodes layer by layer
-        for l in range(self.layers):
-            for node in self.nodes:
-                if node.layer == l:
-                    self.network.append(node)
+        """Compiles the genes into a NetworkPlan; kept until the next mutation."""
+        self.plan = NetworkPlan(self.get_topology(), self.weight)
 
-    def add_node(self, innovation_history):
-        random_connection = random.randint(0, len(self.genes) - 1)
+    def get_topology(self):
+        if self.topology is None:
+            self.topology = NetworkTopology(self)
+        return self.topology
 
-        while self.genes[random_connection].from_node == self.nodes[self.biasNode]:  # Don't disconnect bias
-            random_connection = random.randint(0, len(self.genes) - 1)
+    def add_node(self, innovation_history, random_source=random):
+        random_connection = random_source.randint(0, len(self.innovation) - 1)
+
+        while self.from_number[random_connection] == self.biasNode:  # Don't disconnect bias
+            random_connection = random_source.randint(0, len(self.innovation) - 1)
 
         # Disable this connection
-        self.genes[random_connection].enabled = False
+        self.enabled[random_connection] = False
+        from_number = self.from_number[random_connection]
+        to_number = self.to_number[random_connection]
 
         # Create new node
         new_node = Node(self.nextNode)
-        self.nodes.append(new_node)
+        self.add_node_gene(new_node)
         self.nextNode += 1
 
         # Create new connections
-        connection_innovation = self.get_innovation_number(innovation_history, self.genes[random_connection].from_node, new_node)
-        self.genes.append(connectionGene(self.genes[random_connection].from_node, new_node, 1, connection_innovation))
+        connection_innovation = self.get_innovation_number(innovation_history, from_number, new_node.number)
+        self.add_gene(from_number, new_node.number, 1, connection_innovation)
 
-        connection_innovation = self.get_innovation_number(innovation_history, new_node, self.genes[random_connection].toNode)
-        self.genes.append(connectionGene(new_node, self.genes[random_connection].toNode, self.genes[random_connection].weight, connection_innovation))
+        connection_innovation = self.get_innovation_number(innovation_history, new_node.number, to_number)
+        self.add_gene(new_node.number, to_number, self.weight[random_connection], connection_innovation)
 
-        new_node.layer = self.genes[random_connection].from_node.layer + 1
+        new_node.layer = self.node_index[from_number].layer + 1
 
         # Connect bias to new node
-        connection_innovation = self.get_innovation_number(innovation_history, self.nodes[self.biasNode], new_node)
-        self.genes.append(connectionGene(self.nodes[self.biasNode], new_node, 0, connection_innovation))
+        connection_innovation = self.get_innovation_number(innovation_history, self.biasNode, new_node.number)
+        self.add_gene(self.biasNode, new_node.number, 0, connection_innovation)
 
         # Check if layers need to be adjusted
-        if new_node.layer == self.genes[random_connection].toNode.layer:
-            for node in self.nodes:
+        if new_node.layer == self.node_index[to_number].layer:
+            for node in self.nodes[:-1]:  # Don't include the new node itself
                 if node.layer >= new_node.layer:
                     node.layer += 1
             self.layers += 1
 
-        self.connect_nodes()
+        self.changed()
 
-    def get_innovation_number(self, innovation_history, from_node, to_node):
-        is_new = True
-        connection_innovation_number = nextConnectionNo
+    def changed(self, shape=True):
+        """Drops everything cached from the genes; called whenever they change.
 
-        for history in innovation_history:
-            if history.matches(self, from_node, to_node):
-                is_new = False
-                connection_innovation_number = history.innovation_number
-                break
+        shape=False means only weights changed, so the topology (possibly shared
+        with clones) is still valid and is kept.
+        """
+        if shape:
+            self.topology = None
+        self.plan = None
+        self.sorted_genes = None
 
-        if is_new:
-            inno_numbers = [gene.innovationNo for gene in self.genes]
-            innovation_history.append(connectionHistory(from_node.number, to_node.number, connection_innovation_number, inno_numbers))
-            nextConnectionNo += 1
+    def gene_arrays(self):
+        """Returns the innovation numbers of the genes in ascending order, and their weights."""
+        if self.sorted_genes is None:
+            topology = self.get_topology()
+            weights = np.array(self.weight, dtype=float)
+            self.sorted_genes = (topology.innovations, weights[topology.innovation_order])
+        return self.sorted_genes
 
-        return connection_innovation_number
+    def get_innovation_number(self, innovation_history, from_number, to_number):
+        """Returns the innovation number of a new connection, reusing it if this mutation has happened before."""
+        return innovation_history.get_innovation_number(self, from_number, to_number)
 
-    def add_connection(self, innovation_history):
+    def add_connection(self, innovation_history, random_source=random):
         if self.fully_connected():
             print("Connection failed: fully connected")
             return
 
-        random_node1 = random.randint(0, len(self.nodes) - 1)
-        random_node2 = random.randint(0, len(self.nodes) - 1)
+        random_node1 = random_source.randint(0, len(self.nodes) - 1)
+        random_node2 = random_source.randint(0, len(self.nodes) - 1)
 
-        while self.nodes[random_node1].layer == self.nodes[random_node2].layer or self.nodes[random_node1].is_connected_to(self.nodes[random_node2]):
-            random_node1 = random.randint(0, len(self.nodes) - 1)
-            random_node2 = random.randint(0, len(self.nodes) - 1)
+        while self.nodes[random_node1].layer == self.nodes[random_node2].layer or self.is_connected(self.nodes[random_node1], self.nodes[random_node2]):
+            random_node1 = random_source.randint(0, len(self.nodes) - 1)
+            random_node2 = random_source.randint(0, len(self.nodes) - 1)
 
         # Ensure the first random node is before the second in layers
         if self.nodes[random_node1].layer > self.nodes[random_node2].layer:
             random_node1, random_node2 = random_node2, random_node1
 
-        connection_innovation_number = self.get_innovation_number(innovation_history, self.nodes[random_node1], self.nodes[random_node2])
-        self.genes.append(connectionGene(self.nodes[random_node1], self.nodes[random_node2], random.uniform(-1, 1), connection_innovation_number))
+        from_number, to_number = self.nodes[random_node1].number, self.nodes[random_node2].number
+        connection_innovation_number = self.get_innovation_number(innovation_history, from_number, to_number)
+        self.add_gene(from_number, to_number, random_source.uniform(-1, 1), connection_innovation_number)
 
-        self.connect_nodes()
+        self.changed()
 
     def fully_connected(self):
         max_connections = 0
@@ -189,41 +216,209 @@ class Genome:
             nodes_in_front = sum(nodes_in_layers[j] for j in range(i + 1, self.layers))
             max_connections += nodes_in_layers[i] * nodes_in_front
 
-        return max_connections == len(self.genes)
-
-    def mutate(self, innovation_history):
-        if random.random() < 0.8:  # 80% chance to mutate weights
-            for gene in self.genes:
-                gene.mutate_weight()
+        return max_connections == len(self.innovation)
+
+    def mutate(self, innovation_history, rng=None, random_source=random):
+        """Mutates weights and maybe adds a connection or node.
+
+        rng is the numpy Generator used for the weight mutation; give each
+        genome its own (e.g. from Generator.spawn) to mutate genomes in
+        parallel reproducibly. Without one, a Generator is seeded from
+        random_source. random_source (the random module or a random.Random)
+        makes the other choices.
+        """
+        self.changed(shape=False)  # add_connection and add_node drop the topology themselves
+        if rng is None:
+            rng = np.random.default_rng(random_source.getrandbits(64))
+        if random_source.random() < 0.8:  # 80% chance to mutate weights
+            self.mutate_weights(rng)
+
+        if random_source.random() < 0.05:  # 5% chance to add connection
+            self.add_connection(innovation_history, random_source)
+
+        if random_source.random() < 0.03:  # 3% chance to add node
+            self.add_node(innovation_history, random_source)
+
+    def mutate_weights(self, rng):
+        """Mutates every weight in one pass: 10% are reset, the rest nudged and clamped between -1 and 1."""
+        count = len(self.weight)
+        weights = np.frombuffer(self.weight, dtype=float)  # Writes straight into the weight array
+        reset = rng.random(count) < 0.1
+        nudged = np.clip(weights + rng.standard_normal(count) / 50, -1, 1)
+        weights[:] = np.where(reset, rng.uniform(-1, 1, count), nudged)
+        self.changed(shape=False)
+
+    def crossover(self, parent2, random_source=random):
+        """Returns a child genome; self is assumed to be the fitter parent."""
+        child = Genome(self.inputs, self.outputs, True)
+        child.layers = self.layers
+        child.nextNode = self.nextNode
+        child.biasNode = self.biasNode
+
+        parent2_genes = {innovation_no: i for i, innovation_no in enumerate(parent2.innovation)}
+        for i, innovation_no in enumerate(self.innovation):
+            set_enabled = True
+            parent, gene = self, i
+            parent2_gene = parent2_genes.get(innovation_no, -1)
+            if parent2_gene != -1:  # Matching gene: inherit from either parent
+                if not self.enabled[i] or not parent2.enabled[parent2_gene]:
+                    if random_source.random() < 0.75:  # 75% chance of keeping the connection disabled
+                        set_enabled = False
+                if random_source.random() >= 0.5:
+                    parent, gene = parent2, parent2_gene
+            # Disjoint or excess genes are inherited from the fitter parent
+            child.add_gene(parent.from_number[gene], parent.to_number[gene], parent.weight[gene], innovation_no, set_enabled)
+
+        # The child has the same structure as the fitter parent
+        for node in self.nodes:
+            child.add_node_gene(node.clone())
 
-        if random.random() < 0.05:  # 5% chance to add connection
-            self.add_connection(innovation_history)
+        return child
 
-        if random.random() < 0.03:  # 3% chance to add node
-            self.add_node(innovation_history)
+    def clone(self, share_topology=True):
+        """Returns a copy of this genome; the gene arrays are copied wholesale.
 
-    def clone(self):
+        With share_topology the copy reuses this genome's NetworkTopology
+        (copy-on-write: whichever genome later adds a node or connection
+        builds its own), so a clone that only gets its weights mutated never
+        recompiles its shape.
+        """
         clone_genome = Genome(self.inputs, self.outputs, True)
         clone_genome.layers = self.layers
         clone_genome.nextNode = self.nextNode
         clone_genome.biasNode = self.biasNode
 
-        for node in self.nodes:
-            clone_genome.nodes.append(node.clone())
-
-        for gene in self.genes:
-            from_node = clone_genome.get_node(gene.from_node.number)
-            to_node = clone_genome.get_node(gene.toNode.number)
-            clone_genome.genes.append(gene.clone(from_node, to_node))
+        clone_genome.nodes = [node.clone() for node in self.nodes]
+        clone_genome.node_index = {node.number: node for node in clone_genome.nodes}
+        clone_genome.innovation = array('q', self.innovation)
+        clone_genome.from_number = array('q', self.from_number)
+        clone_genome.to_number = array('q', self.to_number)
+        clone_genome.weight = array('d', self.weight)
+        clone_genome.enabled = array('b', self.enabled)
+        if share_topology:
+            clone_genome.topology = self.topology
 
-        clone_genome.connect_nodes()
         return clone_genome
 
+    def to_bytes(self):
+        """Returns the genome packed into a compact little-endian byte string (see from_bytes)."""
+        node_number = array('q', [node.number for node in self.nodes])
+        node_layer = array('q', [node.layer for node in self.nodes])
+        header = _HEADER.pack(self.inputs, self.outputs, self.layers, self.nextNode, self.biasNode,
+                              len(self.nodes), len(self.innovation))
+        return header + b''.join(_little_endian(values) for values in
+                                 (node_number, node_layer, self.innovation, self.from_number, self.to_number,
+                                  self.weight, self.enabled))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuilds a genome from to_bytes output."""
+        inputs, outputs, layers, next_node, bias_node, node_count, gene_count = _HEADER.unpack_from(data)
+        genome = cls(inputs, outputs, True)
+        genome.layers = layers
+        genome.nextNode = next_node
+        genome.biasNode = bias_node
+
+        offset = _HEADER.size
+        columns = []
+        for typecode, count in (('q', node_count), ('q', node_count), ('q', gene_count), ('q', gene_count),
+                                ('q', gene_count), ('d', gene_count), ('b', gene_count)):
+            values = array(typecode)
+            end = offset + count * values.itemsize
+            values.frombytes(data[offset:end])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            columns.append(values)
+            offset = end
+        node_number, node_layer, genome.innovation, genome.from_number, genome.to_number, genome.weight, genome.enabled = columns
+        for number, layer in zip(node_number, node_layer):
+            node = Node(number)
+            node.layer = layer
+            genome.add_node_gene(node)
+        return genome
+
     def print_genome(self):
         print("Genome Layers:", self.layers)
         print("Bias Node:", self.biasNode)
         print("Nodes:", [node.number for node in self.nodes])
         print("Genes:")
         for gene in self.genes:
-            print(f"Gene {gene.innovationNo}, From Node {gene.from_node.number}, To Node {gene.toNode.number}, Weight: {gene.weight}, Enabled: {gene.enabled}")
-
+            print(f"Gene {gene.innovation_no}, From Node {gene.from_node.number}, To Node {gene.to_node.number}, Weight: {gene.weight}, Enabled: {gene.enabled}")
+
+
+
+class NetworkTopology:
+    """The shape of a genome's network as arrays, independent of the weights.
+
+    Enabled genes are grouped by the layer of the node they feed, as arrays of
+    gene position, source index and target index (indices into the genome's
+    node list). It also holds the genes' innovation numbers in ascending
+    order. Nothing here changes after it is built, so clones can share it.
+    """
+
+    def __init__(self, genome):
+        numbers = np.array([node.number for node in genome.nodes], dtype=np.intp)
+        index = np.zeros(numbers.max() + 1, dtype=np.intp)  # Node number -> position in the node list
+        index[numbers] = np.arange(len(numbers))
+        node_layers = np.array([node.layer for node in genome.nodes])
+        enabled = np.flatnonzero(np.array(genome.enabled, dtype=bool))
+        source = index[np.array(genome.from_number, dtype=np.intp)[enabled]]
+        target = index[np.array(genome.to_number, dtype=np.intp)[enabled]]
+        target_layers = node_layers[target]
+
+        self.size = len(genome.nodes)
+        self.inputs = genome.inputs
+        self.outputs = genome.outputs
+        self.bias = index[genome.biasNode]
+        self.layers = []  # (gene positions, source, target, nodes in layer) for each layer after the inputs
+        for layer in range(1, genome.layers):
+            in_layer = target_layers == layer
+            self.layers.append((enabled[in_layer], source[in_layer], target[in_layer],
+                                np.flatnonzero(node_layers == layer)))
+
+        innovations = np.array(genome.innovation, dtype=np.int64)
+        self.innovation_order = np.argsort(innovations, kind='stable')
+        self.innovations = innovations[self.innovation_order]
+
+
+class NetworkPlan:
+    """A genome's network flattened into arrays for fast evaluation.
+
+    Pairs a NetworkTopology with the weights of the genes, so evaluating a
+    layer is a gather, a bincount and a sigmoid.
+    """
+
+    def __init__(self, topology, weights):
+        weights = np.array(weights, dtype=float)
+        self.size = topology.size
+        self.inputs = topology.inputs
+        self.outputs = topology.outputs
+        self.bias = topology.bias
+        self.layers = []  # (source, target, weight, nodes in layer) for each layer after the inputs
+        for genes, source, target, nodes in topology.layers:
+            self.layers.append((source, target, weights[genes], nodes))
+
+    def evaluate(self, input_values):
+        values = np.zeros(self.size)
+        values[:self.inputs] = input_values
+        values[self.bias] = 1  # Bias node output is always 1
+
+        for source, target, weight, nodes in self.layers:
+            input_sum = np.bincount(target, weights=weight * values[source], minlength=self.size)
+            values[nodes] = sigmoid(input_sum[nodes])
+
+        return values[self.inputs:self.inputs + self.outputs]
+
+
+def _little_endian(values):
+    """Returns the bytes of an array in little-endian order."""
+    if sys.byteorder == 'little':
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def sigmoid(x):
+    # Clamp the input values to avoid overflow errors
+    return 1 / (1 + np.exp(-4.9 * np.clip(x, -60, 60)))
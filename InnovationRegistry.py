@@ -0,0 +1,65 @@
+from connectionHistory import ConnectionHistory
+
+
+class InnovationRegistry:
+    """Hands out innovation numbers, giving the same mutation in the same genome the same number.
+
+    Records are kept in a dict keyed by (from node, to node, genome signature),
+    where the signature is the hash of the genome's set of innovation numbers,
+    so finding an earlier identical mutation is a single lookup. The registry
+    also owns the counter for brand-new innovation numbers.
+    """
+
+    def __init__(self, next_innovation=1000):
+        self.next_innovation = next_innovation  # Innovation number for the next brand-new connection
+        self.records = {}  # (from node, to node, signature) -> list of ConnectionHistory
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for records in self.records.values():
+            yield from records
+
+    @staticmethod
+    def signature(innovation_numbers):
+        return hash(frozenset(innovation_numbers))
+
+    def get_innovation_number(self, genome, from_number, to_number):
+        """Returns the innovation number for a new connection between these node numbers in genome."""
+        innovation_numbers = genome.innovation
+        key = (from_number, to_number, self.signature(innovation_numbers))
+
+        for history in self.records.get(key, ()):  # Almost always zero or one record, more only on a hash collision
+            if history.matches(genome, from_number, to_number):
+                return history.innovation_number
+
+        history = ConnectionHistory(from_number, to_number, self.next_innovation, innovation_numbers)
+        self.add(history)
+        self.next_innovation += 1
+        return history.innovation_number
+
+    def add(self, history):
+        """Stores a ConnectionHistory record (e.g. one read back from a checkpoint)."""
+        key = (history.from_node, history.to_node, self.signature(history.innovation_numbers))
+        self.records.setdefault(key, []).append(history)
+        self.count += 1
+
+    def prune(self, genomes):
+        """Forgets records no genome can match any more.
+
+        Children start with exactly the genes of one of their parents and
+        mutations only add genes, so a record can only be matched again if its
+        genes include all the genes of some genome that is still around.
+        """
+        gene_sets = {frozenset(genome.innovation) for genome in genomes}
+        for key in list(self.records):
+            kept = [history for history in self.records[key]
+                    if any(genes.issubset(history.innovation_numbers) for genes in gene_sets
+                           if len(genes) <= len(history.innovation_numbers))]
+            self.count -= len(self.records[key]) - len(kept)
+            if kept:
+                self.records[key] = kept
+            else:
+                del self.records[key]
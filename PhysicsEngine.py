@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class PhysicsEngine:
+    """Moves the ships, bullets and asteroids of a whole population in one step() call.
+
+    Every player's asteroids live in one set of (players, capacity) arrays,
+    and each player's AsteroidField works on its own row of them, so the game
+    logic (spawning, splitting, collisions, vision) is unchanged while step()
+    moves and wraps every asteroid at once. Ships and bullets are read from
+    the players into arrays at the start of a step and written back after.
+    The rules are those of Player.move, Bullet.move and AsteroidField.move,
+    and come out the same to the last bit.
+
+    step() only moves things. A tick of the population is Player.steer for
+    every player (timers, turning, thrust), one step(), then
+    Player.check_positions for every player.
+    """
+
+    def __init__(self, players, world):
+        self.players = players
+        self.far = np.array([world.width + 50, world.height + 50], dtype=float)  # Past this (or -50) things wrap
+        for player in players:
+            player.start()
+        self.share_asteroids()
+
+    def share_asteroids(self):
+        """Moves every player's asteroids into the engine's arrays, made as long as the longest field."""
+        count = len(self.players)
+        self.capacity = max(len(player.asteroids.alive) for player in self.players)
+        self.asteroid_pos = np.zeros((count, self.capacity, 2))
+        self.asteroid_vel = np.zeros((count, self.capacity, 2))
+        self.asteroid_size = np.zeros((count, self.capacity), dtype=np.int64)
+        self.asteroid_radius = np.zeros((count, self.capacity))
+        self.asteroid_alive = np.zeros((count, self.capacity), dtype=bool)
+        for i, player in enumerate(self.players):
+            player.asteroids.share(self.asteroid_pos[i], self.asteroid_vel[i], self.asteroid_size[i],
+                                   self.asteroid_radius[i], self.asteroid_alive[i])
+
+    def step(self, rows):
+        """Moves the ships, bullets and asteroids of the players at these indices by one tick."""
+        players = [self.players[i] for i in rows]
+        if not players:
+            return
+        if any(len(player.asteroids.alive) > self.capacity for player in players):  # A field outgrew its row
+            self.share_asteroids()
+
+        # Ships: clamp the speed, apply friction, move, wrap
+        ships = np.array([(player.pos.x, player.pos.y, player.vel.x, player.vel.y, player.max_speed)
+                          for player in players], dtype=float)
+        pos, vel, max_speed = ships[:, 0:2], ships[:, 2:4], ships[:, 4]
+        speed = np.sqrt(vel[:, 0] * vel[:, 0] + vel[:, 1] * vel[:, 1])
+        moving = speed > 0
+        vel[moving] = vel[moving] / speed[moving, None] * np.minimum(speed[moving], max_speed[moving])[:, None]
+        vel *= 0.99
+        pos += vel
+        pos[:] = self._wrapped(pos)
+        for player, (x, y, vel_x, vel_y, _) in zip(players, ships.tolist()):
+            player.vel.update(vel_x, vel_y)
+            player.pos.update(x, y)
+
+        # Bullets: count down, move the ones still flying, wrap
+        bullets = [bullet for player in players for bullet in player.bullets]
+        if bullets:
+            state = np.array([(bullet.pos.x, bullet.pos.y, bullet.vel.x, bullet.vel.y, bullet.lifespan)
+                              for bullet in bullets], dtype=float)
+            lifespan = state[:, 4].astype(np.int64) - 1
+            flying = lifespan >= 0
+            state[flying, 0:2] = self._wrapped(state[flying, 0:2] + state[flying, 2:4])
+            for bullet, (x, y, _, _, _), life, flies in zip(bullets, state.tolist(), lifespan.tolist(), flying.tolist()):
+                bullet.lifespan = life
+                if flies:
+                    bullet.pos.update(x, y)
+                else:
+                    bullet.off = True
+
+        # Asteroids: move and wrap, for the given players only
+        playing = np.zeros(len(self.players), dtype=bool)
+        playing[rows] = True
+        live = self.asteroid_alive & playing[:, None]
+        self.asteroid_pos[live] = self._wrapped(self.asteroid_pos[live] + self.asteroid_vel[live])
+
+    def _wrapped(self, pos):
+        """Returns (n, 2) positions with anything more than 50 pixels off an edge moved to the opposite edge."""
+        return np.where(pos < -50, self.far, np.where(pos > self.far, -50.0, pos))
@@ -1,16 +1,18 @@
 import random
 import math
-import pygame
 from pygame.math import Vector2
 from Genome import Genome  
 from Bullet import Bullet  
-from Asteroid import Asteroid  
+from AsteroidField import AsteroidField
+from Collision import SpatialHash
+from World import World
+import Vision
 
 
 class Player:
-    def __init__(self, seed=None):
-        screen_width, screen_height = pygame.display.get_surface().get_size()
-        self.pos = Vector2(screen_width // 2, screen_height // 2)
+    def __init__(self, seed=None, world=None, replay=None, random_source=random, brain=None):
+        self.world = world if world is not None else World()
+        self.pos = Vector2(self.world.width // 2, self.world.height // 2)
         self.vel = Vector2()
         self.acc = Vector2()
 
@@ -21,7 +23,8 @@ class Player:
         self.max_speed = 10
         self.boosting = False
         self.bullets = []
-        self.asteroids = []
+        self.asteroids = None  # AsteroidField, created by start
+        self.collisions = None  # SpatialHash over the asteroids, created by start
         self.asteroid_count = 1000
         self.lives = 0
         self.dead = False
@@ -29,11 +32,11 @@ class Player:
         self.boost_count = 10
 
         # Neural network (AI)
-        self.brain = Genome(33, 4)
+        self.brain = brain if brain is not None else Genome(33, 4, random_source=random_source)
         self.vision = [0.0] * 33
         self.decision = [0.0] * 4
-        self.replay = seed is not None
-        self.seed_used = seed if seed else random.randint(0, 1000000000)
+        self.replay = seed is not None if replay is None else replay  # A given seed means replay unless told otherwise
+        self.seed_used = seed if seed is not None else random_source.randint(0, 1000000000)
         self.seeds_used = []
         self.up_to_seed_no = 0
         self.fitness = 0
@@ -43,34 +46,45 @@ class Player:
         self.lifespan = 0
         self.can_shoot = True
         self.best_score = 0
-
-        random.seed(self.seed_used)
-
-        # Initialize asteroids
+        self.best_lifespan = 0  # Lifespan of the game a replay clone was made from
+        self.best_truncated = None  # Why the game a replay clone was made from was cut short, if it was
+        self.truncated = None  # Budget reason this game was ended early for, None if the ship was destroyed
+        self.idle_anchor = None  # Kept by Budget to spot idle players
+        self.random = None  # This game's own stream, so other players never disturb it; created by start
+
+    @classmethod
+    def from_genome(cls, genome, seed=None, world=None, replay=False, random_source=random):
+        """Returns a player with this brain; no throwaway Genome is built."""
+        return cls(seed, world, replay, random_source, brain=genome)
+
+    def start(self):
+        """Sets up the game (random stream and first asteroids); done on the first look or update.
+
+        Players that never play, like the clones and offspring made during
+        natural selection, never pay for it.
+        """
+        if self.random is not None:
+            return
+        self.random = random.Random(self.seed_used)
+        self.asteroids = AsteroidField(self.world)
+        self.collisions = SpatialHash(self.asteroids)
         self.generate_asteroids()
 
     def generate_asteroids(self):
-        screen_width, screen_height = pygame.display.get_surface().get_size()
+        screen_width, screen_height = self.world.width, self.world.height
         for _ in range(4):
-            rand_x = random.uniform(0, screen_width)
-            rand_y = random.uniform(0, screen_height)
-            asteroid = Asteroid(rand_x, rand_y, random.uniform(-1, 1), random.uniform(-1, 1), 3)
-            self.asteroids.append(asteroid)
+            rand_x = self.random.uniform(0, screen_width)
+            rand_y = self.random.uniform(0, screen_height)
+            self.asteroids.spawn(rand_x, rand_y, self.random.uniform(-1, 1), self.random.uniform(-1, 1), 3)
 
         # Create a fifth asteroid aimed at the player
-        rand_x = random.uniform(0, screen_width)
-        rand_y = -50 + random.choice([0, screen_height + 100])
-        self.asteroids.append(Asteroid(rand_x, rand_y, self.pos.x - rand_x, self.pos.y - rand_y, 3))
+        rand_x = self.random.uniform(0, screen_width)
+        rand_y = -50 + self.random.choice([0, screen_height + 100])
+        self.asteroids.spawn(rand_x, rand_y, self.pos.x - rand_x, self.pos.y - rand_y, 3)
 
     def move(self):
         if not self.dead:
-            self.check_timers()
-            self.rotate_player()
-
-            if self.boosting:
-                self.boost()
-            else:
-                self.boost_off()
+            self.steer()
 
             # Only normalize the velocity if its length is greater than 0
             if self.vel.length() > 0:
@@ -79,53 +93,27 @@ class Player:
             self.vel *= 0.99  # Apply friction
             self.pos += self.vel  # Update position
 
-            # Get screen width and height
-            screen_width, screen_height = pygame.display.get_surface().get_size()
-
             # Move bullets
             for bullet in self.bullets:
-                bullet.move(screen_width, screen_height)  # Pass screen size to bullet.move()
+                bullet.move()
 
             # Move asteroids
-            for asteroid in self.asteroids:
-                asteroid.move(screen_width, screen_height)
+            self.asteroids.move()
 
             # Wrap around the screen
             if self.is_out_of_bounds(self.pos):
                 self.wrap_position()
 
 
-    def show(self):
-        # Define the screen size, assuming a standard resolution (you can modify this as needed)
-        screen_width, screen_height = pygame.display.get_surface().get_size()
-        screen = pygame.display.get_surface()
+    def steer(self):
+        """The part of move that comes before anything moves: timers (new asteroids, shooting), turning and thrust."""
+        self.check_timers()
+        self.rotate_player()
 
-        # Draw the player
-        if not self.dead:
-            if self.immortal_count > 0:
-                # Optional: add logic to flash the player if they're immortal (e.g., after losing a life)
-                if (self.immortal_count // 5) % 2 == 0:
-                    return  # Skip drawing the player to make it flash
-            # Draw the player as a triangle
-            pygame.draw.polygon(screen, (255, 255, 255), self.get_player_vertices())
-
-        # Draw bullets
-        for bullet in self.bullets:
-            bullet.show(screen)
-
-        # Draw asteroids
-        for asteroid in self.asteroids:
-            asteroid.show(screen)
-
-    def get_player_vertices(self):
-        """ Returns the vertices of the player's ship (triangle) for rendering. """
-        size = 12
-        points = [
-            (self.pos.x + math.cos(self.rotation) * 2 * size, self.pos.y + math.sin(self.rotation) * 2 * size),  # Front point
-            (self.pos.x + math.cos(self.rotation + math.pi * 0.8) * size, self.pos.y + math.sin(self.rotation + math.pi * 0.8) * size),  # Back-left point
-            (self.pos.x + math.cos(self.rotation - math.pi * 0.8) * size, self.pos.y + math.sin(self.rotation - math.pi * 0.8) * size)   # Back-right point
-        ]
-        return points
+        if self.boosting:
+            self.boost()
+        else:
+            self.boost_off()
 
     def check_timers(self):
         self.lifespan += 1
@@ -134,18 +122,16 @@ class Player:
 
         if self.asteroid_count <= 0:
             if self.replay:
-                random.seed(self.seeds_used[self.up_to_seed_no])
+                self.random.seed(self.seeds_used[self.up_to_seed_no])
                 self.up_to_seed_no += 1
             else:
-                seed = random.randint(0, 1000000)
+                seed = self.random.randint(0, 1000000)
                 self.seeds_used.append(seed)
-                random.seed(seed)
+                self.random.seed(seed)
 
-            screen_width, screen_height = pygame.display.get_surface().get_size()
-            rand_x = random.uniform(0, screen_width)
-            rand_y = -50 + random.choice([0, screen_height + 100])
-            asteroid = Asteroid(rand_x, rand_y, self.pos.x - rand_x, self.pos.y - rand_y, 3)
-            self.asteroids.append(asteroid)
+            rand_x = self.random.uniform(0, self.world.width)
+            rand_y = -50 + self.random.choice([0, self.world.height + 100])
+            self.asteroids.spawn(rand_x, rand_y, self.pos.x - rand_x, self.pos.y - rand_y, 3)
             self.asteroid_count = 1000
 
         if self.shoot_count <= 0:
@@ -161,11 +147,11 @@ class Player:
         self.rotation += self.spin
 
     def is_out_of_bounds(self, pos):
-        screen_width, screen_height = pygame.display.get_surface().get_size()
+        screen_width, screen_height = self.world.width, self.world.height
         return pos.x < -50 or pos.x > screen_width + 50 or pos.y < -50 or pos.y > screen_height + 50
 
     def wrap_position(self):
-        screen_width, screen_height = pygame.display.get_surface().get_size()
+        screen_width, screen_height = self.world.width, self.world.height
         if self.pos.x < -50:
             self.pos.x = screen_width + 50
         elif self.pos.x > screen_width + 50:
@@ -178,28 +164,36 @@ class Player:
 
     def shoot(self):
         if self.shoot_count <= 0:
-            bullet = Bullet(self.pos.x, self.pos.y, self.rotation, self.vel.length())
+            bullet = Bullet(self.pos.x, self.pos.y, self.rotation, self.vel.length(), self.world)
             self.bullets.append(bullet)
             self.shoot_count = 50
             self.can_shoot = False
             self.shots_fired += 1
 
     def check_positions(self):
-        screen_width, screen_height = pygame.display.get_surface().get_size()
-        # Check if bullets hit asteroids
-        for bullet in self.bullets:
-            for asteroid in self.asteroids:
-                if asteroid.check_if_hit(bullet.pos, screen_width, screen_height):  # Pass screen size
-                    self.shots_hit += 1
-                    self.bullets.remove(bullet)
-                    self.score += 1
-                    break
+        self.collisions.rebuild()
+
+        # Check if bullets hit asteroids. Spent bullets are dropped here too, in place
+        i = 0
+        while i < len(self.bullets):
+            bullet = self.bullets[i]
+            slot = self.collisions.bullet_hit(bullet.pos)
+            if slot >= 0:
+                self.asteroids.is_hit(slot)
+                self.collisions.rebuild()  # Pick up the pieces it broke into
+                self.shots_hit += 1
+                self.score += 1
+                del self.bullets[i]
+            elif bullet.off:
+                del self.bullets[i]
+            else:
+                i += 1
 
         # Check if player hit by asteroid
         if self.immortal_count <= 0:
-            for asteroid in self.asteroids:
-                if asteroid.check_if_hit_player(self.pos, screen_width, screen_height):  # Pass screen size
-                    self.player_hit()
+            for slot in self.collisions.player_hits(self.pos):
+                self.asteroids.is_hit(slot)
+                self.player_hit()
 
     def player_hit(self):
         if self.lives == 0:
@@ -209,14 +203,28 @@ class Player:
             self.immortal_count = 100
             self.reset_position()
 
+    def truncate(self, reason):
+        """Ends the game early (see Budget), keeping the score and lifespan reached so far."""
+        self.dead = True
+        self.truncated = reason
+
     def reset_position(self):
-        screen_width, screen_height = pygame.display.get_surface().get_size()
-        self.pos = Vector2(screen_width / 2, screen_height / 2)
+        self.pos = Vector2(self.world.width / 2, self.world.height / 2)
         self.vel = Vector2()
         self.acc = Vector2()
         self.bullets = []
         self.rotation = 0
 
+    def apply_episode_result(self, result):
+        """Take on the outcome of an episode that was played elsewhere (see Episode.run_episode)."""
+        self.score = result["score"]
+        self.lifespan = result["lifespan"]
+        self.shots_fired = result["shots_fired"]
+        self.shots_hit = result["shots_hit"]
+        self.seeds_used = list(result["seeds_used"])
+        self.truncated = result.get("truncated")
+        self.dead = True
+
     def calculate_fitness(self):
         hit_rate = self.shots_hit / self.shots_fired
         self.fitness = (self.score + 1) * 10
@@ -224,80 +232,31 @@ class Player:
         self.fitness *= hit_rate * hit_rate
         self.unadjusted_fitness = self.fitness
 
-    def clone(self):
-        clone_player = Player()
-        clone_player.brain = self.brain.clone()
+    def clone(self, random_source=random, keep_seed=False):
+        seed = self.seed_used if keep_seed else None  # By default the clone gets a game of its own
+        clone_player = Player.from_genome(self.brain.clone(), seed, self.world, random_source=random_source)
         clone_player.fitness = self.fitness
-        clone_player.brain.generate_network()
         return clone_player
 
     def clone_for_replay(self):
-        clone_player = Player(self.seed_used)
-        clone_player.brain = self.brain.clone()
+        clone_player = Player.from_genome(self.brain.clone(), self.seed_used, self.world, replay=True)
         clone_player.fitness = self.fitness
         clone_player.best_score = self.score
+        clone_player.best_lifespan = self.lifespan
+        clone_player.best_truncated = self.truncated
         clone_player.seeds_used = self.seeds_used[:]
-        clone_player.brain.generate_network()
         return clone_player
 
-    def crossover(self, parent2):
-        child_player = Player()
-        child_player.brain = self.brain.crossover(parent2.brain)
-        child_player.brain.generate_network()
-        return child_player
+    def crossover(self, parent2, random_source=random):
+        return Player.from_genome(self.brain.crossover(parent2.brain, random_source), world=self.world,
+                                  random_source=random_source)
 
     def look(self):
-        self.vision = [0.0] * 33
-        for i in range(16):
-            angle = self.rotation + i * (math.pi / 8)
-            direction = Vector2(math.cos(angle), math.sin(angle)) * 10
-            self.look_in_direction(direction, i)
-
-        if self.can_shoot and self.vision[0] != 0:
-            self.vision[32] = 1
-        else:
-            self.vision[32] = 0
-
-    def look_in_direction(self, direction, vision_pos):
-        position = self.pos + direction
-        distance = 1  # Initialize distance to 1 to avoid zero division
-        looped = Vector2(0, 0)
-
-        screen_width, screen_height = pygame.display.get_surface().get_size()
-
-        while distance < 60:
-            for asteroid in self.asteroids:
-                if asteroid.look_for_hit(position, screen_width, screen_height):  # Pass screen size
-                    self.vision[vision_pos] = 1 / distance  # No zero division
-
-                    asteroid_hit = asteroid.get_asteroid(position, screen_width, screen_height)  # Pass screen size
-                    towards_player = (self.pos - asteroid_hit.pos - looped).normalize()
-                    red_shift = asteroid_hit.vel.dot(towards_player)
-                    self.vision[vision_pos + 1] = red_shift
-
-            position += direction
-            distance += 1  # Increment the distance
-
-            # Loop the position
-            if position.x < -50:
-                position.x += screen_width + 100
-                looped.x += screen_width + 100
-            elif position.x > screen_width + 50:
-                position.x -= screen_width + 100
-                looped.x -= screen_width + 100
-
-            if position.y < -50:
-                position.y += screen_height + 100
-                looped.y += screen_height + 100
-            elif position.y > screen_height + 50:
-                position.y -= screen_height + 100
-                looped.y -= screen_height + 100
-
+        self.start()
+        self.vision = Vision.look(self)
 
     def update(self):
-        # Remove bullets that have expired (i.e., bullets that have 'off' set to True)
-        self.bullets = [bullet for bullet in self.bullets if not bullet.off]
-
+        self.start()
         # Move everything (player, bullets, asteroids)
         self.move()
 
@@ -1,20 +1,75 @@
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from Player import Player
-from Species import Species
-from connectionHistory import ConnectionHistory 
+from BatchBrain import BatchBrain
+from PhysicsEngine import PhysicsEngine
+from Budget import Budget
+from Episode import run_episode
+from FitnessCache import FitnessCache, fingerprint
+from World import World
+from Species import Species, compatibility_matrix
+from InnovationRegistry import InnovationRegistry
+import Checkpoint
+import Distributed
 
 class Population:
-    def __init__(self, size):
-        self.pop = [Player() for _ in range(size)]  # List of players
-        for player in self.pop:
-            player.brain.generate_network()  # Generate the neural network for each player
+    def __init__(self, size, world=None, seed=None):
+        self.world = world if world is not None else World()  # Shared playing field, no display needed
+        seed = seed if seed is not None else random.getrandbits(64)  # Seeding random still reproduces a run
+        self.random = random.Random(seed)  # Stream for the evolution operators (selection, crossover, mutation, new seeds)
+        self.rng = np.random.default_rng(seed)  # Weight mutation stream; every baby gets a child generator spawned from it
+        self.pop = [Player(world=self.world, random_source=self.random) for _ in range(size)]  # List of players
 
         self.best_player = None  # The best player ever
         self.best_score = 0  # Score of the best player ever
         self.gen = 1  # Start generation count from 1, not 100
-        self.innovation_history = []  # List of connection histories
+        self.innovation_history = InnovationRegistry()  # Innovation numbers handed out so far
+        self.prune_innovation_history = False  # Forget innovations no genome can match any more after each generation
         self.gen_players = []  # Players of the current generation
         self.species = []  # List of species
+        self.executor = None  # Process pool used by evaluate, created on first use
+        self.executor_workers = None
+        self.batch_brain = None  # Networks of the current generation packed for update_all
+        self.physics = None  # PhysicsEngine moving the current generation in update_all
+        self.checkpoint_writer = None  # Checkpoint.CheckpointWriter, see enable_checkpoints
+        self.coordinator = None  # Distributed.Coordinator, see serve_workers
+        self.budget = Budget()  # Limits on episode length, off unless set (see Budget)
+        self.deadline = None  # Wall-clock cutoff of the generation being stepped, set on its first tick
+        self.fitness_cache = None  # FitnessCache used by evaluate, see enable_fitness_cache
+        self.keep_clone_seeds = False  # Clones made in natural selection play their parent's seed again
+
+    @classmethod
+    def resume(cls, path, world=None):
+        """Rebuilds a population from a checkpoint written by enable_checkpoints, on its field size unless world is given."""
+        return Checkpoint.restore(cls(0, world), path, world)
+
+    def enable_checkpoints(self, path, every=10):
+        """Saves the whole evolutionary state to path every few generations, in the background."""
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
+        self.checkpoint_writer = Checkpoint.CheckpointWriter(path, every)
+
+    def serve_workers(self, host='127.0.0.1', port=0, task_timeout=None, worker_wait=60.0):
+        """Makes evaluate hand episodes to TCP workers instead of local processes; returns the address to connect to.
+
+        evaluate raises ConnectionError if no worker is connected for
+        worker_wait seconds while it waits for results.
+        """
+        if self.coordinator is not None:
+            self.coordinator.close()
+        self.coordinator = Distributed.Coordinator(host, port, task_timeout, worker_wait)
+        return self.coordinator.address
+
+    def enable_fitness_cache(self, size=4096, keep_clone_seeds=True):
+        """Makes evaluate reuse the results of games already played with the same network and seed.
+
+        Seeds only repeat if clones keep their parent's seed, so that is
+        switched on too unless keep_clone_seeds is False.
+        """
+        self.fitness_cache = FitnessCache(size)
+        self.keep_clone_seeds = keep_clone_seeds
 
 
     def update_alive(self, show_best=False):
@@ -23,8 +78,122 @@ class Population:
                 player.look()  # Get inputs for brain
                 player.think()  # Use outputs from the neural network
                 player.update()  # Move the player based on neural network output
-                player.show()  # Show only this player's movements
-                break  # Stop after showing the first alive player
+                self.budget.check(player, self.generation_deadline())
+                break  # Stop after updating the first alive player
+
+    def update_all(self):
+        """Steps every alive player by one tick, thinking for all of them in one BatchBrain call and moving them in one PhysicsEngine step."""
+        if self.batch_brain is None:
+            self.batch_brain = BatchBrain([player.brain for player in self.pop])
+        if self.physics is None:
+            self.physics = PhysicsEngine(self.pop, self.world)
+        deadline = self.generation_deadline()
+        self.batch_brain.drop([i for i in self.batch_brain.rows if self.pop[i].dead])
+        players = [self.pop[i] for i in self.batch_brain.rows]
+        if not players:
+            return
+
+        for player in players:
+            player.look()
+        decisions = self.batch_brain.forward(np.array([player.vision for player in players]))
+        boosting, spin, shoot = BatchBrain.decide(decisions)
+
+        for i, player in enumerate(players):
+            player.decision = decisions[i]
+            player.boosting = bool(boosting[i])
+            player.spin = float(spin[i])
+            if shoot[i]:
+                player.shoot()
+            player.steer()
+
+        self.physics.step(self.batch_brain.rows)
+        for player in players:
+            player.check_positions()
+            self.budget.check(player, deadline)
+
+    def generation_deadline(self):
+        """Returns the wall-clock cutoff of the generation being stepped, starting its clock on the first tick."""
+        if self.deadline is None:
+            self.deadline = self.budget.deadline()
+        return self.deadline
+
+    def first_alive(self):
+        """Returns the player update_alive is currently stepping (the one worth drawing)."""
+        for player in self.pop:
+            if not player.dead:
+                return player
+        return self.pop[0]
+
+    def evaluate(self, workers=None):
+        """Play every player's episode to the end, then breed the next generation.
+
+        Each player's genome and seed are sent to a pool of worker processes
+        (workers=None uses one per CPU, workers=1 plays them in this process),
+        or to the TCP workers connected after serve_workers, if it was called.
+        Games are cut short as self.budget says. With a fitness cache, only
+        games not already in it are played, each of them once.
+        """
+        genomes = [player.brain for player in self.pop]
+        seeds = [player.seed_used for player in self.pop]
+        if self.fitness_cache is None:
+            results = self.play(genomes, seeds, workers)
+        else:
+            results = self.play_cached(genomes, seeds, workers)
+
+        for player, result in zip(self.pop, results):
+            player.apply_episode_result(result)
+
+        self.natural_selection()
+
+    def play_cached(self, genomes, seeds, workers=None):
+        """Like play, but takes results from the fitness cache where it can and stores the new ones."""
+        keys = [fingerprint(genome, seed, self.world, self.budget) for genome, seed in zip(genomes, seeds)]
+        results = [self.fitness_cache.get(key) for key in keys]
+        missing = {}  # Key -> index of the first genome to play it, so duplicates are only played once
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                missing.setdefault(key, i)
+
+        played = self.play([genomes[i] for i in missing.values()], [seeds[i] for i in missing.values()], workers)
+        for key, result in zip(missing, played):
+            self.fitness_cache.put(key, result)
+            missing[key] = result
+        return [result if result is not None else missing[key] for key, result in zip(keys, results)]
+
+    def play(self, genomes, seeds, workers=None):
+        """Plays one episode per genome and seed as evaluate describes and returns the results in order."""
+        if not genomes:
+            return []
+        worlds = [self.world] * len(genomes)
+        budgets = [self.budget] * len(genomes)
+        deadlines = [self.budget.deadline()] * len(genomes)
+
+        if self.coordinator is not None:
+            results = self.coordinator.map(genomes, seeds, self.world, self.budget, deadlines[0])
+        elif workers == 1:
+            results = list(map(run_episode, genomes, seeds, worlds, budgets, deadlines))
+        else:
+            if self.executor is None or self.executor_workers != workers:
+                if self.executor is not None:
+                    self.executor.shutdown()
+                self.executor = ProcessPoolExecutor(max_workers=workers)
+                self.executor_workers = workers
+            chunksize = max(1, len(genomes) // ((workers or os.cpu_count() or 1) * 4))
+            results = list(self.executor.map(run_episode, genomes, seeds, worlds, budgets, deadlines,
+                                             chunksize=chunksize))
+        return results
+
+    def close(self):
+        """Shut down the evaluation worker processes, if any were started, and finish pending checkpoints."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.coordinator is not None:
+            self.coordinator.close()
+            self.coordinator = None
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
+            self.checkpoint_writer = None
 
     def done(self):
         return all(player.dead for player in self.pop)
@@ -54,32 +223,46 @@ class Population:
 
         # Breed new children from each species
         for s in self.species:
-            children.append(s.players[0].clone())  # Champion without mutation
+            children.append(s.players[0].clone(self.random, self.keep_clone_seeds))  # Champion without mutation
             num_children = int(s.average_fitness / average_sum * len(self.pop)) - 1
             for _ in range(num_children):
-                children.append(s.give_me_baby(self.innovation_history))
+                children.append(s.give_me_baby(self.innovation_history, self.rng.spawn(1)[0], self.random,
+                                               self.keep_clone_seeds))
 
         # If not enough children, get from the best species
         while len(children) < len(self.pop):
-            children.append(self.species[0].give_me_baby(self.innovation_history))
+            children.append(self.species[0].give_me_baby(self.innovation_history, self.rng.spawn(1)[0], self.random,
+                                                         self.keep_clone_seeds))
 
         self.pop = children  # Replace the population with the new generation
+        self.batch_brain = None
+        self.physics = None
+        self.deadline = None
+        if self.prune_innovation_history:
+            self.innovation_history.prune(player.brain for player in self.pop)
         self.gen += 1  # Increment the generation count after each natural selection
         print(f"Generation {self.gen}, Mutations {len(self.innovation_history)}, Species: {len(self.species)}")
 
-
-        # Generate networks for each child
-        for player in self.pop:
-            player.brain.generate_network()
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.maybe_save(self)
 
     def speciate(self):
         for s in self.species:
             s.players.clear()  # Clear players for each species
 
-        for player in self.pop:
+        # Distances to the existing species in one batch; species created below are checked one by one
+        existing = len(self.species)
+        if existing:
+            distances = compatibility_matrix([player.brain for player in self.pop], self.species)
+
+        for i, player in enumerate(self.pop):
             species_found = False
-            for s in self.species:
-                if s.same_species(player.brain):
+            for j, s in enumerate(self.species):
+                if j < existing:
+                    compatible = s.compatibility_threshold > distances[i, j]
+                else:
+                    compatible = s.same_species(player.brain)
+                if compatible:
                     s.add_to_species(player)
                     species_found = True
                     break
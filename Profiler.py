@@ -0,0 +1,148 @@
+import cProfile
+import functools
+import json
+import sys
+import time
+from Genome import Genome
+from Player import Player
+from Population import Population
+from Species import Species
+
+
+# (class, method) pairs timed while the profiler is enabled. Times are
+# inclusive: update contains check_positions, natural_selection contains
+# speciate, calculate_fitness and give_me_baby. Population.evaluate is left
+# out as it ends by calling natural_selection; wall_s covers it.
+PHASES = (
+    (Player, 'look'),
+    (Player, 'think'),
+    (Player, 'update'),
+    (Player, 'check_positions'),
+    (Player, 'calculate_fitness'),
+    (Genome, 'generate_network'),
+    (Species, 'give_me_baby'),
+    (Population, 'speciate'),
+    (Population, 'natural_selection'),
+)
+
+
+class Profiler:
+    """Per-phase timers and call counters, written out once per generation as JSON lines.
+
+    Nothing is instrumented until enable() is called: it swaps timing
+    wrappers in for the methods in PHASES (on the classes, so it covers
+    every Population in this process), and disable() puts the originals
+    back, so a disabled profiler costs nothing. Each natural_selection then
+    writes one line like
+
+        {"gen": 3, "wall_s": 4.2, "ticks": 51234, "ticks_per_s": 12198.6,
+         "phases": {"look": {"calls": 51234, "seconds": 1.9}, ...}}
+
+    to path (or stdout). Ticks are the lifespans of the generation's
+    players, so they are counted even when the games ran in worker
+    processes; the per-tick phases (look, think, update, check_positions)
+    only show up for games played in this process. With
+    cprofile_generation=N, generation N additionally runs under cProfile
+    and its stats are saved next to path (or to profile.genN.prof).
+    """
+
+    def __init__(self, path=None, cprofile_generation=None):
+        self.path = path
+        self.cprofile_generation = cprofile_generation
+        self.originals = {}  # (class, method name) -> original function
+        self.current = {}  # Phase name -> [calls, seconds] for the generation in progress
+        self.generation_start = None
+        self.cprofile = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def enable(self):
+        if self.originals:
+            return
+        self._reset()
+        if self.cprofile_generation == 1:
+            self._start_cprofile()
+        for cls, name in PHASES:
+            original = cls.__dict__[name]
+            self.originals[(cls, name)] = original
+            wrapper = self._wrap_natural_selection(original) if name == 'natural_selection' else self._wrap(name, original)
+            setattr(cls, name, wrapper)
+
+    def disable(self):
+        for (cls, name), original in self.originals.items():
+            setattr(cls, name, original)
+        self.originals.clear()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile = None
+
+    def _reset(self):
+        self.current = {name: [0, 0.0] for _, name in PHASES}
+        self.generation_start = time.perf_counter()
+
+    def _wrap(self, name, function):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                entry = self.current[name]
+                entry[0] += 1
+                entry[1] += time.perf_counter() - start
+        return timed
+
+    def _wrap_natural_selection(self, function):
+        timed = self._wrap('natural_selection', function)
+
+        @functools.wraps(function)
+        def natural_selection(population, *args, **kwargs):
+            gen = population.gen
+            ticks = sum(player.lifespan for player in population.pop)  # Read before the children replace them
+            result = timed(population, *args, **kwargs)
+            self.end_generation(gen, ticks)
+            if population.gen == self.cprofile_generation:
+                self._start_cprofile()
+            return result
+        return natural_selection
+
+    def end_generation(self, gen, ticks):
+        """Writes the report for generation gen and starts timing the next one."""
+        wall = time.perf_counter() - self.generation_start
+        report = {
+            'gen': gen,
+            'wall_s': round(wall, 6),
+            'ticks': ticks,
+            'ticks_per_s': round(ticks / wall, 1) if wall > 0 else None,
+            'phases': {name: {'calls': calls, 'seconds': round(seconds, 6)}
+                       for name, (calls, seconds) in self.current.items() if calls},
+        }
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            report['cprofile'] = self._cprofile_path(gen)
+            self.cprofile.dump_stats(report['cprofile'])
+            self.cprofile = None
+        self._write(report)
+        self._reset()
+
+    def _start_cprofile(self):
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+
+    def _cprofile_path(self, gen):
+        stem = self.path.rsplit('.', 1)[0] if self.path else 'profile'
+        return f"{stem}.gen{gen}.prof"
+
+    def _write(self, report):
+        line = json.dumps(report)
+        if self.path is None:
+            print(line)
+            sys.stdout.flush()
+        else:
+            with open(self.path, 'a') as file:
+                file.write(line + '\n')
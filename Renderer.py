@@ -0,0 +1,134 @@
+import math
+import numpy as np
+import pygame
+
+
+# Drawing lives here so Player, AsteroidField and Bullet never need a display.
+#
+# Shapes are worked out once: asteroids are a 12-sided unit polygon scaled by
+# their radius, and the ship is precomputed for ROTATION_BUCKETS rotations.
+# Each shape is also pre-rendered to a small sprite the first time it is
+# needed, so drawing any number of players is a list of (sprite, position)
+# pairs handed to a single Surface.blits call.
+
+WHITE = (255, 255, 255)
+SHIP_SIZE = 12
+ROTATION_BUCKETS = 256  # Ship rotations are drawn to the nearest 1/256 of a turn
+BULLET_SIZE = 3
+
+
+def unit_polygon(npoints=12):
+    angles = np.arange(npoints) * (2 * math.pi / npoints)
+    return np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+_ASTEROID_TEMPLATE = unit_polygon()
+_SHIP_ANGLES = np.arange(ROTATION_BUCKETS)[:, None] * (2 * math.pi / ROTATION_BUCKETS) + np.array([0, math.pi * 0.8, -math.pi * 0.8])
+_SHIP_TEMPLATES = np.stack([np.cos(_SHIP_ANGLES), np.sin(_SHIP_ANGLES)], axis=2) * np.array([2 * SHIP_SIZE, SHIP_SIZE, SHIP_SIZE])[:, None]  # Front, back-left, back-right point
+
+BACKGROUND = (0, 0, 0)  # Sprites use it as their transparent colour key (run-length encoded, so they blit fast)
+
+_asteroid_sprites = {}  # Radius -> Surface
+_ship_sprites = {}  # Rotation bucket -> Surface
+_bullet_sprite = None
+
+
+class Snapshot:
+    """A copy of what is on screen for one player, taken between simulation steps.
+
+    Drawing from a snapshot means the main loop can take it whenever it is
+    time to draw, and the simulation can keep stepping the player meanwhile.
+    """
+
+    def __init__(self, player):
+        # Flash the ship while the player is immortal (e.g., after losing a life)
+        self.ship_visible = not player.dead and (player.immortal_count <= 0 or (player.immortal_count // 5) % 2 != 0)
+        self.pos = (player.pos.x, player.pos.y)
+        self.rotation = player.rotation
+        self.bullets = [(bullet.pos.x, bullet.pos.y) for bullet in player.bullets if not bullet.off]
+        field = player.asteroids
+        if field is None:  # Game not started yet
+            self.asteroid_pos, self.asteroid_radius = [], []
+        else:
+            live = field.live()
+            self.asteroid_pos = field.pos[live].tolist()
+            self.asteroid_radius = field.radius[live].tolist()
+
+
+def draw_player(screen, player):
+    """Draw a player's ship together with its bullets and asteroids."""
+    draw_snapshots(screen, [Snapshot(player)])
+
+
+def draw_snapshot(screen, snapshot):
+    draw_snapshots(screen, [snapshot])
+
+
+def draw_snapshots(screen, snapshots):
+    """Draws any number of players' ships, bullets and asteroids with one blits call."""
+    screen.blits(sprite_positions(snapshots), doreturn=False)
+
+
+def sprite_positions(snapshots):
+    """Returns the (sprite, top-left corner) pairs that draw these snapshots."""
+    blits = []
+    bullet = bullet_sprite()
+    for snapshot in snapshots:
+        if snapshot.ship_visible:
+            x, y = snapshot.pos
+            blits.append((ship_sprite(rotation_bucket(snapshot.rotation)), (x - 2 * SHIP_SIZE - 1, y - 2 * SHIP_SIZE - 1)))
+        for position in snapshot.bullets:
+            blits.append((bullet, position))
+        for (x, y), radius in zip(snapshot.asteroid_pos, snapshot.asteroid_radius):
+            sprite = _asteroid_sprites.get(radius) or asteroid_sprite(radius)
+            blits.append((sprite, (x - radius - 1, y - radius - 1)))
+    return blits
+
+
+def rotation_bucket(rotation):
+    return round(rotation * (ROTATION_BUCKETS / (2 * math.pi))) % ROTATION_BUCKETS
+
+
+def asteroid_sprite(radius):
+    """Returns the pre-rendered asteroid of this radius, drawn centred on a (2 * radius + 2) square."""
+    sprite = _asteroid_sprites.get(radius)
+    if sprite is None:
+        size = 2 * math.ceil(radius) + 2
+        sprite = new_sprite(size, size)
+        pygame.draw.polygon(sprite, WHITE, (_ASTEROID_TEMPLATE * radius + radius + 1).tolist())
+        _asteroid_sprites[radius] = finish_sprite(sprite)
+    return sprite
+
+
+def ship_sprite(bucket):
+    """Returns the pre-rendered ship for this rotation bucket, drawn centred on a (4 * SHIP_SIZE + 2) square."""
+    sprite = _ship_sprites.get(bucket)
+    if sprite is None:
+        size = 4 * SHIP_SIZE + 2
+        sprite = new_sprite(size, size)
+        pygame.draw.polygon(sprite, WHITE, (_SHIP_TEMPLATES[bucket] + 2 * SHIP_SIZE + 1).tolist())
+        _ship_sprites[bucket] = finish_sprite(sprite)
+    return sprite
+
+
+def bullet_sprite():
+    global _bullet_sprite
+    if _bullet_sprite is None:
+        _bullet_sprite = new_sprite(BULLET_SIZE, BULLET_SIZE)
+        pygame.draw.ellipse(_bullet_sprite, WHITE, (0, 0, BULLET_SIZE, BULLET_SIZE))
+        _bullet_sprite = finish_sprite(_bullet_sprite)
+    return _bullet_sprite
+
+
+def new_sprite(width, height):
+    sprite = pygame.Surface((width, height))
+    sprite.fill(BACKGROUND)
+    return sprite
+
+
+def finish_sprite(sprite):
+    """Makes the sprite's background transparent and converts it to the display's format, if there is a display."""
+    sprite.set_colorkey(BACKGROUND, pygame.RLEACCEL)
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        sprite = sprite.convert()
+    return sprite
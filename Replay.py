@@ -0,0 +1,174 @@
+import argparse
+import json
+import sys
+from array import array
+from Genome import Genome
+from Node import Node
+from Player import Player
+from World import World
+
+
+class Replay:
+    """Everything needed to play a champion's game again, away from the Population that made it.
+
+    Holds the genome (as plain arrays), the seed the game started from, the
+    seeds drawn for later asteroids, the size of the world and the recorded
+    outcome. Saved as a small JSON file, so it can be copied to any machine
+    and played back with:
+
+        python Replay.py champion.json           # headless, full speed, checks the outcome
+        python Replay.py champion.json --render  # watch it at 60 FPS
+    """
+
+    def __init__(self, genome, seed_used, seeds_used, lifespan, score, world, truncated=None):
+        self.genome = genome
+        self.seed_used = seed_used
+        self.seeds_used = list(seeds_used)
+        self.lifespan = lifespan  # Ticks the recorded game lasted
+        self.score = score  # Asteroids hit in the recorded game
+        self.world = world
+        self.truncated = truncated  # Budget reason the recorded game was cut short for, if it was
+
+    @classmethod
+    def from_player(cls, player):
+        """Makes a replay of a player that has played its game (or of a clone_for_replay of one)."""
+        if player.replay:  # A clone_for_replay carries the outcome of the game it was cloned from
+            lifespan, score, truncated = player.best_lifespan, player.best_score, player.best_truncated
+        else:
+            lifespan, score, truncated = player.lifespan, player.score, player.truncated
+        return cls(player.brain.clone(), player.seed_used, player.seeds_used, lifespan, score, player.world, truncated)
+
+    def save(self, path):
+        data = {
+            'seed_used': self.seed_used,
+            'seeds_used': self.seeds_used,
+            'lifespan': self.lifespan,
+            'score': self.score,
+            'truncated': self.truncated,
+            'world': [self.world.width, self.world.height],
+            'genome': genome_data(self.genome),
+        }
+        with open(path, 'w') as file:
+            json.dump(data, file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            data = json.load(file)
+        genome = genome_from_data(data['genome'])
+        return cls(genome, data['seed_used'], data['seeds_used'], data['lifespan'], data['score'], World(*data['world']),
+                   data.get('truncated'))
+
+    def player(self):
+        """Returns a fresh Player set up to replay the recorded game."""
+        player = Player.from_genome(self.genome.clone(), self.seed_used, self.world, replay=True)
+        player.brain.generate_network()
+        player.seeds_used = self.seeds_used[:]
+        return player
+
+    def run(self):
+        """Plays the game headless at full speed and returns the finished Player."""
+        player = self.player()
+        while not player.dead:
+            player.look()
+            player.think()
+            player.update()
+            self.cut(player)
+        player.calculate_fitness()
+        return player
+
+    def cut(self, player):
+        """Ends the playback where the recorded game was cut short by its budget, if it was."""
+        if self.truncated is not None and not player.dead and player.lifespan >= self.lifespan:
+            player.truncate(self.truncated)
+
+    def matches(self, player):
+        """Returns whether a finished playback reproduced the recorded outcome."""
+        return player.score == self.score and player.lifespan == self.lifespan and player.truncated == self.truncated
+
+
+def genome_data(genome):
+    """Returns the genome as a dict of plain lists, ready for JSON (see genome_from_data)."""
+    return {
+        'inputs': genome.inputs,
+        'outputs': genome.outputs,
+        'layers': genome.layers,
+        'next_node': genome.nextNode,
+        'bias_node': genome.biasNode,
+        'node_number': [node.number for node in genome.nodes],
+        'node_layer': [node.layer for node in genome.nodes],
+        'innovation': genome.innovation.tolist(),
+        'from_number': genome.from_number.tolist(),
+        'to_number': genome.to_number.tolist(),
+        'weight': genome.weight.tolist(),
+        'enabled': genome.enabled.tolist(),
+    }
+
+
+def genome_from_data(genes):
+    """Rebuilds a genome from genome_data output."""
+    genome = Genome(genes['inputs'], genes['outputs'], True)
+    genome.layers = genes['layers']
+    genome.nextNode = genes['next_node']
+    genome.biasNode = genes['bias_node']
+    for number, layer in zip(genes['node_number'], genes['node_layer']):
+        node = Node(number)
+        node.layer = layer
+        genome.add_node_gene(node)
+    genome.innovation = array('q', genes['innovation'])
+    genome.from_number = array('q', genes['from_number'])
+    genome.to_number = array('q', genes['to_number'])
+    genome.weight = array('d', genes['weight'])
+    genome.enabled = array('b', genes['enabled'])
+    return genome
+
+
+def play(replay, fps=60):
+    """Shows the replay in a window at fps frames per second; returns the finished Player."""
+    import pygame
+    import Renderer
+
+    pygame.init()
+    screen = pygame.display.set_mode((replay.world.width, replay.world.height))
+    pygame.display.set_caption("Asteroid NEAT Replay")
+    clock = pygame.time.Clock()
+
+    player = replay.player()
+    while not player.dead:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return player
+        player.look()
+        player.think()
+        player.update()
+        replay.cut(player)
+
+        screen.fill((0, 0, 0))
+        Renderer.draw_player(screen, player)
+        pygame.display.flip()
+        clock.tick(fps)
+
+    pygame.quit()
+    player.calculate_fitness()
+    return player
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a champion saved with Replay.save.")
+    parser.add_argument('path')
+    parser.add_argument('--render', action='store_true', help="show the game instead of running it headless")
+    parser.add_argument('--fps', type=int, default=60)
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    player = play(replay, args.fps) if args.render else replay.run()
+    print(f"Score: {player.score} (recorded {replay.score}), "
+          f"lifespan: {player.lifespan} (recorded {replay.lifespan}), fitness: {player.fitness}")
+    if not player.dead:
+        return 0  # Window closed before the end of the game
+    return 0 if replay.matches(player) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
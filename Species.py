@@ -1,7 +1,7 @@
 import random
+import numpy as np
 from Player import Player
 from Genome import Genome
-from connectionHistory import ConnectionHistory
 
 class Species:
     def __init__(self, player=None):
@@ -25,13 +25,15 @@ class Species:
 
     def same_species(self, genome):
         """Returns whether the genome is in this species based on compatibility."""
-        excess_and_disjoint = self.get_excess_disjoint(genome, self.rep)
-        average_weight_diff = self.average_weight_diff(genome, self.rep)
+        return self.compatibility_threshold > self.compatibility(genome)
+
+    def compatibility(self, genome):
+        """Returns the compatibility distance between the genome and this species' representative."""
+        excess_and_disjoint, average_weight_diff = compare_genes(genome, self.rep)
         large_genome_normalizer = 1  # Can use genome size as a normalizer
 
-        compatibility = (self.excess_coeff * excess_and_disjoint / large_genome_normalizer) + \
-                        (self.weight_diff_coeff * average_weight_diff)
-        return self.compatibility_threshold > compatibility
+        return (self.excess_coeff * excess_and_disjoint / large_genome_normalizer) + \
+               (self.weight_diff_coeff * average_weight_diff)
 
     def add_to_species(self, player):
         """Add a player to the species."""
@@ -39,27 +41,11 @@ class Species:
 
     def get_excess_disjoint(self, genome1, genome2):
         """Returns the number of excess and disjoint genes between two genomes."""
-        matching_genes = 0
-        for gene1 in genome1.genes:
-            for gene2 in genome2.genes:
-                if gene1.innovation_no == gene2.innovation_no:
-                    matching_genes += 1
-                    break
-        return (len(genome1.genes) + len(genome2.genes) - 2 * matching_genes)
+        return compare_genes(genome1, genome2)[0]
 
     def average_weight_diff(self, genome1, genome2):
         """Returns the average weight difference between matching genes in two genomes."""
-        matching_genes = 0
-        total_weight_diff = 0
-        for gene1 in genome1.genes:
-            for gene2 in genome2.genes:
-                if gene1.innovation_no == gene2.innovation_no:
-                    matching_genes += 1
-                    total_weight_diff += abs(gene1.weight - gene2.weight)
-                    break
-        if matching_genes == 0:
-            return 100  # Avoid division by zero
-        return total_weight_diff / matching_genes
+        return compare_genes(genome1, genome2)[1]
 
     def sort_species(self):
         """Sort players by fitness."""
@@ -79,27 +65,30 @@ class Species:
         total_fitness = sum(player.fitness for player in self.players)
         self.average_fitness = total_fitness / len(self.players)
 
-    def give_me_baby(self, innovation_history):
-        """Create a baby by crossover or cloning."""
-        if random.random() < 0.25:  # 25% chance to clone a random player
-            baby = self.select_player().clone()
+    def give_me_baby(self, innovation_history, rng=None, random_source=random, keep_seed=False):
+        """Create a baby by crossover or cloning; rng and random_source are passed on to Genome.mutate.
+
+        With keep_seed a cloned baby plays its parent's seed rather than a new one.
+        """
+        if random_source.random() < 0.25:  # 25% chance to clone a random player
+            baby = self.select_player(random_source).clone(random_source, keep_seed)
         else:  # 75% chance to crossover between two parents
-            parent1 = self.select_player()
-            parent2 = self.select_player()
+            parent1 = self.select_player(random_source)
+            parent2 = self.select_player(random_source)
 
             # Ensure the fitter player is used as the base of the crossover
             if parent1.fitness < parent2.fitness:
-                baby = parent2.crossover(parent1)
+                baby = parent2.crossover(parent1, random_source)
             else:
-                baby = parent1.crossover(parent2)
+                baby = parent1.crossover(parent2, random_source)
 
-        baby.brain.mutate(innovation_history)
+        baby.brain.mutate(innovation_history, rng, random_source)
         return baby
 
-    def select_player(self):
+    def select_player(self, random_source=random):
         """Select a player based on fitness."""
         fitness_sum = sum(player.fitness for player in self.players)
-        rand = random.uniform(0, fitness_sum)
+        rand = random_source.uniform(0, fitness_sum)
         running_sum = 0
 
         for player in self.players:
@@ -118,3 +107,59 @@ class Species:
         """Apply fitness sharing among players."""
         for player in self.players:
             player.fitness /= len(self.players)
+
+
+def compare_genes(genome1, genome2):
+    """Returns the number of excess and disjoint genes and the average weight difference of matching genes.
+
+    Both genomes' genes are kept sorted by innovation number (Genome.gene_arrays),
+    so the matching genes are found in a single merge pass.
+    """
+    innovations1, weights1 = genome1.gene_arrays()
+    innovations2, weights2 = genome2.gene_arrays()
+    position = np.searchsorted(innovations2, innovations1)
+    position[position == len(innovations2)] = 0
+    matching = innovations2[position] == innovations1 if len(innovations2) else np.zeros(len(innovations1), dtype=bool)
+
+    matching_genes = int(matching.sum())
+    excess_and_disjoint = len(innovations1) + len(innovations2) - 2 * matching_genes
+    if matching_genes == 0:
+        return excess_and_disjoint, 100  # Avoid division by zero
+    return excess_and_disjoint, float(np.abs(weights1[matching] - weights2[position[matching]]).mean())
+
+
+def compatibility_matrix(genomes, species):
+    """Returns the compatibility distance of every genome to every species' representative, as a (genomes, species) array.
+
+    The genomes' genes are laid out on a shared axis of innovation numbers,
+    once. Each representative then only looks at the columns of its own
+    genes, so memory stays at (genomes, innovation numbers) however many
+    species there are.
+    """
+    tables = [genome.gene_arrays() for genome in genomes]
+    rep_tables = [s.rep.gene_arrays() for s in species]
+    vocabulary = np.unique(np.concatenate([innovations for innovations, _ in tables + rep_tables]))
+
+    gene_counts = np.array([len(innovations) for innovations, _ in tables])
+    rows = np.repeat(np.arange(len(tables)), gene_counts)
+    columns = np.searchsorted(vocabulary, np.concatenate([innovations for innovations, _ in tables]))
+    present = np.zeros((len(tables), len(vocabulary)), dtype=bool)
+    weights = np.zeros((len(tables), len(vocabulary)))
+    present[rows, columns] = True
+    weights[rows, columns] = np.concatenate([gene_weights for _, gene_weights in tables])
+
+    matching = np.zeros((len(tables), len(species)))
+    weight_diff = np.zeros((len(tables), len(species)))
+    for j, (innovations, rep_weights) in enumerate(rep_tables):
+        columns = np.searchsorted(vocabulary, innovations)
+        both = present[:, columns]  # Genes each genome shares with this representative
+        matching[:, j] = both.sum(axis=1)
+        weight_diff[:, j] = (np.abs(weights[:, columns] - rep_weights) * both).sum(axis=1)
+
+    excess_and_disjoint = gene_counts[:, None] + np.array([len(innovations) for innovations, _ in rep_tables])[None, :] - 2 * matching
+    average_weight_diff = np.where(matching > 0, weight_diff / np.maximum(matching, 1), 100)
+
+    excess_coeff = np.array([s.excess_coeff for s in species])
+    weight_diff_coeff = np.array([s.weight_diff_coeff for s in species])
+    large_genome_normalizer = 1
+    return excess_coeff * excess_and_disjoint / large_genome_normalizer + weight_diff_coeff * average_weight_diff
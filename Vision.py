@@ -0,0 +1,121 @@
+import math
+import numpy as np
+
+
+# A player looks along 16 rays. Each ray is sampled every 10 pixels at distances
+# 1..59 (in steps), wrapping around the screen like everything else, and sees the
+# first asteroid one of those samples lands in.
+RAYS = 16
+STEPS = 59
+STEP_LENGTH = 10
+
+_SAMPLES = np.arange(1, STEPS + 1, dtype=float)
+_RAY_ANGLES = np.arange(RAYS) * (math.pi / 8)
+
+
+def look(player):
+    """Returns the 33 element vision vector for a player.
+
+    For ray i, vision[i] is 1 / (steps to the first asteroid) and vision[i + 1]
+    its red shift (velocity towards the player); the next ray's distance
+    overwrites that red shift when it sees something too. vision[32] is 1 if
+    the player can shoot and something is straight ahead.
+    """
+    vision = [0.0] * 33
+    field = player.asteroids
+    slots = field.live()
+    if len(slots):
+        steps, red_shift = cast_rays(player.pos.x, player.pos.y, player.rotation,
+                                     field.pos[slots], field.vel[slots], field.radius[slots],
+                                     player.world.width, player.world.height)
+        for i in range(RAYS):
+            if steps[i]:
+                vision[i] = 1 / steps[i]
+                vision[i + 1] = red_shift[i]
+
+    vision[32] = 1 if player.can_shoot and vision[0] != 0 else 0
+    return vision
+
+
+def cast_rays(x, y, rotation, pos, vel, radius, width, height):
+    """Cast every ray against every asteroid at once.
+
+    Instead of marching the samples, each ray is split into pieces between
+    wrap-arounds and intersected analytically with each asteroid circle (plus
+    the wrap-around ghost of asteroids near an edge), then rounded to the first
+    sample inside the circle. Returns the step of the first hit for each ray (0
+    for a miss) and the red shift of the asteroid hit.
+    """
+    origin = np.array([x, y])
+    angles = rotation + _RAY_ANGLES
+    direction = np.stack([np.cos(angles), np.sin(angles)], axis=1) * STEP_LENGTH
+
+    # Where each sample lands before wrapping, and how far wrapping moves it.
+    # The first sample is taken before the first wrap check, like the old loop.
+    span = np.array([width + 100, height + 100], dtype=float)
+    unwrapped = origin + _SAMPLES[None, :, None] * direction[:, None, :]
+    looped = -np.floor((unwrapped + 50) / span) * span
+    looped[:, 0] = 0
+
+    # Pieces of each ray over which the wrap offset is constant
+    change = np.ones((RAYS, STEPS), dtype=bool)
+    change[:, 1:] = np.any(looped[:, 1:] != looped[:, :-1], axis=2)
+    ray, first = np.nonzero(change)
+    last = np.full_like(first, STEPS - 1)
+    same_ray = ray[:-1] == ray[1:]
+    last[:-1][same_ray] = first[1:][same_ray] - 1
+    offset = looped[ray, first]
+
+    # Circles to test: every asteroid, plus its ghost on the far side when near an edge
+    centers, radii, owner = _with_ghosts(pos, radius, width, height)
+
+    # Solve |origin + offset + t * direction - center| < radius for t on every piece
+    d = direction[ray]
+    q = (origin + offset)[:, None, :] - centers[None, :, :]
+    a = np.sum(d * d, axis=1)[:, None]
+    b = np.sum(q * d[:, None, :], axis=2)
+    c = np.sum(q * q, axis=2) - radii[None, :] ** 2
+    disc = b * b - a * c
+    root = np.sqrt(np.maximum(disc, 0))
+    t_in = (-b - root) / a
+    t_out = (-b + root) / a
+
+    step = np.maximum(np.floor(t_in) + 1, first[:, None] + 1)
+    hits = (disc > 0) & (step <= last[:, None] + 1) & (step < t_out)
+
+    # Earliest sample wins; ties go to the asteroid earliest in the list
+    count = len(pos)
+    miss = (STEPS + 1) * count
+    key = np.where(hits, step * count + owner[None, :], miss).astype(np.int64)
+    best = np.full(RAYS, miss, dtype=np.int64)
+    np.minimum.at(best, ray, key.min(axis=1))
+
+    steps = np.zeros(RAYS, dtype=np.int64)
+    red_shift = np.zeros(RAYS)
+    seen = best < miss
+    if seen.any():
+        hit_step = best[seen] // count
+        hit = best[seen] % count
+        towards_player = origin - pos[hit] - looped[seen, hit_step - 1]
+        length = np.hypot(towards_player[:, 0], towards_player[:, 1])
+        length[length == 0] = np.inf
+        steps[seen] = hit_step
+        red_shift[seen] = np.sum(vel[hit] * towards_player, axis=1) / length
+    return steps, red_shift
+
+
+def _with_ghosts(pos, radius, width, height):
+    """Asteroid circles plus the wrapped copy (see AsteroidField.overlap_positions) of those near an edge."""
+    shift = np.zeros_like(pos)
+    shift[:, 0] += np.where(pos[:, 0] < -50 + radius, width + 100, 0)
+    shift[:, 0] -= np.where(pos[:, 0] > width + 50 - radius, width + 100, 0)
+    shift[:, 1] += np.where(pos[:, 1] < -50 + radius, height + 100, 0)
+    shift[:, 1] -= np.where(pos[:, 1] > height + 50 - radius, height + 100, 0)
+    near = ((pos[:, 0] < -50 + radius) | (pos[:, 0] > width + 50 - radius) |
+            (pos[:, 1] < -50 + radius) | (pos[:, 1] > height + 50 - radius))
+
+    index = np.arange(len(pos))
+    centers = np.concatenate([pos, pos[near] + shift[near]])
+    radii = np.concatenate([radius, radius[near]])
+    owner = np.concatenate([index, index[near]])
+    return centers, radii, owner
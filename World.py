@@ -0,0 +1,17 @@
+class World:
+    """Size of the playing field shared by players, asteroids and bullets.
+
+    The simulation only needs the width and height, so it never has to touch
+    a pygame display. Everything can wrap 50 pixels past each edge.
+    """
+
+    def __init__(self, width=800, height=600):
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_display(cls):
+        """Build a world matching the current pygame display surface."""
+        import pygame
+        width, height = pygame.display.get_surface().get_size()
+        return cls(width, height)
@@ -0,0 +1,8 @@
+"""Seeded microbenchmarks for the simulation and NEAT hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks                           # run everything and print the timings
+    python -m benchmarks --save baseline.json      # ... and store them as a baseline
+    python -m benchmarks --compare baseline.json   # flag anything slower than the baseline
+"""
@@ -0,0 +1,35 @@
+import argparse
+import sys
+from benchmarks import runner, suite
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Seeded microbenchmarks of the hot paths.")
+    parser.add_argument('--save', metavar='PATH', help="store the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a JSON baseline and exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=0.1, help="slowdown counted as a regression (default 0.1 = 10%%)")
+    parser.add_argument('--sizes', nargs='+', choices=list(suite.GENOME_SIZES), help="genome sizes to run (default all)")
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1, help="seconds to spend on each repeat")
+    args = parser.parse_args(argv)
+
+    benchmarks = [b for b in suite.benchmarks(args.sizes) if args.filter in b[0]]
+    results = runner.run_all(benchmarks, args.repeat, args.min_time)
+
+    if args.save:
+        runner.save(results, args.save)
+
+    if args.compare:
+        rows = runner.compare(runner.load(args.compare), results, args.threshold)
+        print()
+        print(f"{'benchmark':<40} {'baseline':>12} {'now':>12} {'ratio':>7}")
+        for name, old, new, ratio, regressed in rows:
+            print(f"{name:<40} {old:>10.1f}us {new:>10.1f}us {ratio:>7.2f}{'  REGRESSION' if regressed else ''}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import json
+import platform
+import time
+import numpy as np
+
+
+def measure(run, setup=None, repeat=5, min_time=0.1):
+    """Times run(state) and returns the per-call timings in microseconds.
+
+    Without setup, run is called in a loop often enough to last at least
+    min_time seconds (the count is worked out on the first repeat), repeat
+    times. With setup, every call gets a fresh state (so benchmarks that
+    change their state, like natural selection, start from the same point
+    each time) and single calls are timed, at least repeat of them and
+    until min_time has been spent in run.
+    """
+    timings = []
+    if setup is not None:
+        total = 0
+        while (len(timings) < repeat or total < min_time) and len(timings) < 500:
+            state = setup()
+            start = time.perf_counter()
+            run(state)
+            timings.append(time.perf_counter() - start)
+            total += timings[-1]
+        number = 1
+    else:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                run(None)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time or number >= 1 << 20:
+                break
+            number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+        timings.append(elapsed / number)
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                run(None)
+            timings.append((time.perf_counter() - start) / number)
+
+    timings = np.array(timings) * 1e6
+    return {'min_us': float(timings.min()), 'median_us': float(np.median(timings)), 'calls': number, 'samples': len(timings)}
+
+
+def run_all(benchmarks, repeat=5, min_time=0.1, report=print):
+    """Runs (name, setup, run) benchmarks and returns {name: timings}."""
+    results = {}
+    for name, setup, run in benchmarks:
+        results[name] = measure(run, setup, repeat, min_time)
+        report(f"{name:<40} {results[name]['min_us']:>12.1f} us")
+    return results
+
+
+def save(results, path):
+    data = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def compare(baseline, results, threshold=0.1):
+    """Returns (name, baseline us, new us, ratio, regressed) for every benchmark in both.
+
+    Best-of-repeat times are compared, as they are the least noisy; a
+    benchmark regressed if it got more than threshold (0.1 = 10%) slower.
+    """
+    rows = []
+    for name in sorted(set(baseline) & set(results)):
+        old, new = baseline[name]['min_us'], results[name]['min_us']
+        ratio = new / old if old else float('inf')
+        rows.append((name, old, new, ratio, ratio > 1 + threshold))
+    return rows
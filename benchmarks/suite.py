@@ -0,0 +1,128 @@
+import contextlib
+import copy
+import io
+import random
+import numpy as np
+from Genome import Genome
+from PhysicsEngine import PhysicsEngine
+from InnovationRegistry import InnovationRegistry
+from Player import Player
+from Population import Population
+from Species import Species
+from World import World
+
+
+SEED = 1234
+# Genome sizes, as the number of hidden nodes added to the starting 33-input, 4-output network
+GENOME_SIZES = {'small': 0, 'medium': 8, 'large': 32}
+POPULATION_SIZE = 50
+
+
+def make_genome(hidden_nodes, seed=SEED, innovation_history=None):
+    """Returns a genome grown from the starting network by adding hidden nodes (and its innovation history)."""
+    random_source = random.Random(seed)
+    innovation_history = innovation_history if innovation_history is not None else InnovationRegistry()
+    genome = Genome(33, 4, random_source=random_source)
+    for _ in range(hidden_nodes):
+        genome.add_node(innovation_history, random_source)
+    genome.mutate_weights(np.random.default_rng(seed))
+    return genome, innovation_history
+
+
+def make_player(seed=SEED, asteroids=12, bullets=3):
+    """Returns a started player in a busy mid-game state: extra asteroids and some bullets in flight."""
+    random_source = random.Random(seed)
+    player = Player.from_genome(make_genome(0, seed)[0], seed, World())
+    player.start()
+    for _ in range(asteroids - len(player.asteroids)):
+        player.asteroids.spawn(random_source.uniform(0, 800), random_source.uniform(0, 600),
+                               random_source.uniform(-1, 1), random_source.uniform(-1, 1), random_source.choice([1, 2, 3]))
+    for _ in range(bullets):
+        player.rotation = random_source.uniform(0, 6.28)
+        player.shoot_count = 0
+        player.shoot()
+    return player
+
+
+def make_population(hidden_nodes, seed=SEED):
+    """Returns a population that has played (with made-up, seeded results) and been through one natural selection."""
+    random_source = random.Random(seed)
+    population = Population(POPULATION_SIZE, World(), seed=seed)
+    for player in population.pop:
+        for _ in range(hidden_nodes):
+            player.brain.add_node(population.innovation_history, population.random)
+    play(population, random_source)
+    with contextlib.redirect_stdout(io.StringIO()):
+        population.natural_selection()
+    play(population, random_source)
+    return population
+
+
+def play(population, random_source):
+    """Gives every player a made-up episode result instead of simulating its game."""
+    for player in population.pop:
+        player.apply_episode_result({
+            'score': random_source.randint(0, 20),
+            'lifespan': random_source.randint(100, 3000),
+            'shots_fired': 30,
+            'shots_hit': random_source.randint(1, 20),
+            'seeds_used': [],
+        })
+
+
+def quiet(function):
+    """Wraps function so whatever it prints is dropped."""
+    def run(state):
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(state)
+    return run
+
+
+def player_benchmarks():
+    player = make_player()  # Never stepped itself: every call gets a copy, so timings don't depend on how many ran before
+    return [
+        ('player.look', lambda: copy.deepcopy(player), lambda state: state.look()),
+        ('player.move', lambda: copy.deepcopy(player), lambda state: state.move()),
+        ('player.check_positions', lambda: copy.deepcopy(player), lambda state: state.check_positions()),
+        (f'physics.step[{POPULATION_SIZE} players]',
+         lambda: PhysicsEngine([copy.deepcopy(player) for _ in range(POPULATION_SIZE)], World()),
+         lambda state: state.step(list(range(POPULATION_SIZE)))),
+    ]
+
+
+def genome_benchmarks(label, hidden_nodes):
+    genome, innovation_history = make_genome(hidden_nodes)
+    genome.generate_network()
+    inputs = list(np.random.default_rng(SEED).uniform(-1, 1, 33))
+    relative = genome.clone()
+    relative.mutate_weights(np.random.default_rng(SEED + 1))
+    species = Species()
+    species.rep = genome
+    return [
+        (f'genome.feed_forward[{label}]', None, lambda _: genome.feed_forward(inputs)),
+        (f'genome.clone[{label}]', None, lambda _: genome.clone()),
+        (f'genome.mutate[{label}]',
+         lambda: (genome.clone(), copy.deepcopy(innovation_history), random.Random(SEED), np.random.default_rng(SEED)),
+         quiet(lambda state: state[0].mutate(state[1], state[3], state[2]))),
+        (f'species.same_species[{label}]', None, lambda _: species.same_species(relative)),
+    ]
+
+
+def population_benchmarks(label, hidden_nodes):
+    population = make_population(hidden_nodes)
+    return [
+        (f'population.speciate[{label}]', lambda: copy.deepcopy(population), lambda state: state.speciate()),
+        (f'population.natural_selection[{label}]', lambda: copy.deepcopy(population),
+         quiet(lambda state: state.natural_selection())),
+    ]
+
+
+def benchmarks(sizes=None):
+    """Returns every benchmark as (name, setup, run), for the given genome size labels (all by default)."""
+    sizes = sizes or list(GENOME_SIZES)
+    result = player_benchmarks()
+    for label in sizes:
+        result += genome_benchmarks(label, GENOME_SIZES[label])
+    for label in sizes:
+        result += population_benchmarks(label, GENOME_SIZES[label])
+    return result
@@ -1,24 +1,44 @@
-import random
-
 class ConnectionGene:
-    def __init__(self, from_node, to_node, weight, innovation_no):
-        self.from_node = from_node  # The node where the connection starts
-        self.to_node = to_node  # The node where the connection ends
-        self.weight = weight  # The weight of the connection
-        self.enabled = True  # Whether this connection is enabled
-        self.innovation_no = innovation_no  # The innovation number to track genome changes
-
-    def mutate_weight(self):
-        """Mutates the weight of the connection."""
-        if random.random() < 0.1:  # 10% chance to completely change the weight
-            self.weight = random.uniform(-1, 1)
-        else:  # Slightly adjust the weight
-            self.weight += random.gauss(0, 1) / 50
-            # Clamp the weight between -1 and 1
-            self.weight = max(min(self.weight, 1), -1)
-
-    def clone(self, from_node, to_node):
-        """Returns a copy of this connectionGene with the same weight and innovation number."""
-        clone = ConnectionGene(from_node, to_node, self.weight, self.innovation_no)
-        clone.enabled = self.enabled
-        return clone
+    """A view of one gene in a Genome's gene arrays.
+
+    Holds only the genome and the gene's position, so reading an attribute
+    reads the arrays and setting one writes through to them.
+    """
+    __slots__ = ('genome', 'index')
+
+    def __init__(self, genome, index):
+        self.genome = genome
+        self.index = index
+
+    @property
+    def from_node(self):
+        """The node where the connection starts."""
+        return self.genome.node_index[self.genome.from_number[self.index]]
+
+    @property
+    def to_node(self):
+        """The node where the connection ends."""
+        return self.genome.node_index[self.genome.to_number[self.index]]
+
+    @property
+    def innovation_no(self):
+        """The innovation number used to track genome changes."""
+        return self.genome.innovation[self.index]
+
+    @property
+    def weight(self):
+        return self.genome.weight[self.index]
+
+    @weight.setter
+    def weight(self, weight):
+        self.genome.weight[self.index] = weight
+        self.genome.changed(shape=False)
+
+    @property
+    def enabled(self):
+        return bool(self.genome.enabled[self.index])
+
+    @enabled.setter
+    def enabled(self, enabled):
+        self.genome.enabled[self.index] = enabled
+        self.genome.changed()
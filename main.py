@@ -1,6 +1,9 @@
 import pygame
 import sys
+import time
 from Population import Population
+from World import World
+import Renderer
 
 # Initialize pygame
 pygame.init()
@@ -15,23 +18,60 @@ pygame.display.set_caption("Asteroid NEAT Evolution")
 
 font = pygame.font.Font(None, 36)
 
+# Display modes, switched with the keys 1, 2 and 3 (TAB cycles through them):
+#   WATCH - the original view: speed_multiplier ticks per frame at 60 FPS (UP/DOWN change the speed)
+#   FAST  - the simulation runs flat out and a snapshot of the player on show is drawn RENDER_FPS times a second,
+#           only in every render_every-th generation (+/- change it)
+#   TURBO - no drawing at all, just a status line once a second
+WATCH, FAST, TURBO = "watch", "fast", "turbo"
+MODES = (WATCH, FAST, TURBO)
+RENDER_FPS = 30
+STATUS_INTERVAL = 1.0  # Seconds between status redraws when nothing else is drawn
+
+
+def step(population):
+    """Advances every player by one tick, breeding the next generation once they are all dead."""
+    population.update_all()
+    if population.done():
+        population.natural_selection()
+
+
+def draw_status(population, mode, speed_multiplier, render_every, ticks_per_second):
+    lines = [
+        f"Generation: {population.gen}",
+        f"Current Population: {len(population.pop)}",
+        f"Mode: {mode}" + (f" ({speed_multiplier}x)" if mode == WATCH else
+                           f" (every {render_every} gen)" if mode == FAST else ""),
+        f"Best score: {population.best_score}",
+        f"Ticks/s: {ticks_per_second:.0f}",
+    ]
+    for i, line in enumerate(lines):
+        screen.blit(font.render(line, True, (255, 255, 255)), (10, 10 + 40 * i))
+
+
 def main():
     clock = pygame.time.Clock()
     population_size = 100  # Define your population size
-    population = Population(population_size)
-    
-    speed_multiplier = 1  # Default speed, you can increase this to speed up the game
+    population = Population(population_size, World(SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    mode = WATCH
+    speed_multiplier = 1  # Ticks per frame in WATCH mode
     max_speed = 10  # Max speed multiplier allowed
     min_speed = 1   # Min speed multiplier allowed
+    render_every = 1  # FAST mode only draws generations that are a multiple of this
+
+    ticks = 0
+    ticks_per_second = 0.0
+    rate_start = time.perf_counter()
+    last_status = 0.0
 
     running = True
     while running:
-        screen.fill((0, 0, 0))  # Fill the screen with black before drawing anything
-
-        # Event loop for closing the window and controlling speed
+        # Event loop for closing the window and switching modes
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+                population.close()
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
@@ -39,34 +79,53 @@ def main():
                     speed_multiplier = min(max_speed, speed_multiplier + 1)
                 elif event.key == pygame.K_DOWN:  # Decrease speed
                     speed_multiplier = max(min_speed, speed_multiplier - 1)
-
-        # Update the game state multiple times according to speed_multiplier
-        for _ in range(speed_multiplier):
-            population.update_alive()
-
-        # Show the player's movement and evolution (only the first player alive is shown)
-        population.pop[0].show()
-
-        # Display the generation count and population count
-        generation_text = f"Generation: {population.gen}"
-        population_count_text = f"Current Population: {len(population.pop)}"
-        speed_text = f"Speed: {speed_multiplier}x"
-
-        # Render the texts
-        generation_surface = font.render(generation_text, True, (255, 255, 255))
-        population_count_surface = font.render(population_count_text, True, (255, 255, 255))
-        speed_surface = font.render(speed_text, True, (255, 255, 255))
-
-        screen.blit(generation_surface, (10, 10))
-        screen.blit(population_count_surface, (10, 50))
-        screen.blit(speed_surface, (10, 90))
-
-        # Update the display
-        pygame.display.flip()
-
-        # Cap the frame rate to 60 FPS
-        clock.tick(60)
-
+                elif event.key == pygame.K_1:
+                    mode = WATCH
+                elif event.key == pygame.K_2:
+                    mode = FAST
+                elif event.key == pygame.K_3:
+                    mode = TURBO
+                elif event.key == pygame.K_TAB:
+                    mode = MODES[(MODES.index(mode) + 1) % len(MODES)]
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    render_every += 1
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    render_every = max(1, render_every - 1)
+                last_status = 0.0  # Show the change straight away
+
+        # Simulate: a fixed number of ticks per frame when watching, otherwise as many as fit in a frame
+        if mode == WATCH:
+            for _ in range(speed_multiplier):
+                step(population)
+            ticks += speed_multiplier
+        else:
+            deadline = time.perf_counter() + (1 / RENDER_FPS if mode == FAST else STATUS_INTERVAL / 4)
+            while time.perf_counter() < deadline:
+                step(population)
+                ticks += 1
+
+        now = time.perf_counter()
+        if now - rate_start >= 1:
+            ticks_per_second = ticks / (now - rate_start)
+            ticks, rate_start = 0, now
+
+        # Draw
+        if mode == WATCH or (mode == FAST and population.gen % render_every == 0):
+            # Show the player's movement and evolution (only the first player alive is shown)
+            snapshot = Renderer.Snapshot(population.first_alive())
+            screen.fill((0, 0, 0))  # Fill the screen with black before drawing anything
+            Renderer.draw_snapshot(screen, snapshot)
+            draw_status(population, mode, speed_multiplier, render_every, ticks_per_second)
+            pygame.display.flip()
+        elif now - last_status >= STATUS_INTERVAL:
+            screen.fill((0, 0, 0))
+            draw_status(population, mode, speed_multiplier, render_every, ticks_per_second)
+            pygame.display.flip()
+            last_status = now
+
+        if mode == WATCH:
+            # Cap the frame rate to 60 FPS
+            clock.tick(60)
 
 
 if __name__ == "__main__":